@@ -3,19 +3,25 @@ import os
 from functools import partial
 
 import maya.OpenMaya as om
+import maya.api.OpenMayaAnim as om2Anim
 from maya import cmds
 
-from .skin import getSkinCluster
+from .skin import getSkinCluster, skinCluster_batch, handle_cache
+from .skin.npy_settings import SkinClusterSettings
 
 # depends on the environment has numpy or not, import npyLoadSkin and npySaveSkin
 try:
     import numpy as np
 except ImportError:
-    np, npyLoadSkin, npySaveSkin = None, None, None
+    np, npyLoadSkin, npySaveSkin, ExportPipeline, read_ahead = None, None, None, None, None
+    InfluenceTable = None
 if np:
     from .skin.skinIO import npyLoadSkin, npySaveSkin
+    from .skin.npy_skinIO import InfluenceTable
+    from .skin.npy_pipeline import ExportPipeline, read_ahead
 from .utils.helpers import timing
 from .utils.file_versioning import versionFile
+from .utils.library_index import library_index
 
 DEBUG = False
 
@@ -36,8 +42,40 @@ def _pack_data_notchanged(data_to_write, data_loaded):
     return data_to_write == data_loaded
 
 
+def _report_export(results):
+    """ print the outcome of an ExportPipeline, returns the results that produced a file """
+    exported = []
+    skipped = []
+    for result in results:
+        # ...the workers keep their messages, maya output is main thread only
+        for message in result.messages:
+            om.MGlobal.displayInfo(message)
+        if result.error is not None:
+            om.MGlobal.displayWarning("{}: export failed: {}".format(result.mesh, result.error))
+        elif result.written is None:
+            om.MGlobal.displayWarning("{}: Skipped because don't have Skin Cluster".format(result.mesh))
+        else:
+            exported.append(result)
+            if result.written:
+                om.MGlobal.displayInfo(result.file_path)
+            else:
+                skipped.append(str(result.mesh))
+    if skipped:
+        om.MGlobal.displayInfo("{} of {} meshes unchanged, skipped: {}".format(len(skipped), len(results), skipped))
+    return exported
+
+
 @timing
-def exportSkinPack(packPath, objs, versioning=False, file_ext=".gSkin"):
+def exportSkinPack(packPath, objs, versioning=False, file_ext=".gSkin", incremental=False,
+                   precision="float64", index="int32", codec=None, chunk_size=None):
+    """
+    Args:
+        precision(str): weight storage, float64, float32 or quantized uint16
+        index(str): influence id storage, int32 or int16
+        codec(str): section compression, none, zlib, lzma or bz2
+        chunk_size(int): gather the weights this many vertices at a time, meshes over
+            STREAM_VTX_COUNT vertices are streamed by default (see SkinClusterIO.get_data)
+    """
     debug("operation[exportSkinPack] <file_ext>{}".format(file_ext))
     packDic = {
         "packFiles": [],
@@ -46,24 +84,21 @@ def exportSkinPack(packPath, objs, versioning=False, file_ext=".gSkin"):
 
     packDic["rootPath"], packName = os.path.split(packPath)
 
-    for obj in objs:
-        fileName = obj.stripNamespace() + file_ext
-        filePath = os.path.join(packDic["rootPath"], fileName)
-        if versioning:
-            versionFile(filePath)
-        # if file_ext != ".npySkin" and skin.exportSkin(filePath, [obj]):
-        #     packDic["packFiles"].append(fileName)
-        #     om.MGlobal.displayInfo(filePath)
-        if file_ext != ".npySkin":
-            print("something went wrong")
-            return
-        elif file_ext == ".npySkin":
-            npySaveSkin(obj, filePath)
-            packDic["packFiles"].append(fileName)
-            om.MGlobal.displayInfo(filePath)
-        else:
-            om.MGlobal.displayWarning(
-                obj + ": Skipped because don't have Skin Cluster")
+    if file_ext != ".npySkin":
+        print("something went wrong")
+        return
+    # ...gather on this thread, compress/version/write in the pool, the pack is written once all are done
+    with skinCluster_batch(report=debug), ExportPipeline(precision=precision, index=index, codec=codec,
+                                             chunk_size=chunk_size) as pipeline:
+        for obj in objs:
+            fileName = obj.stripNamespace() + file_ext
+            filePath = os.path.join(packDic["rootPath"], fileName)
+            # if file_ext != ".npySkin" and skin.exportSkin(filePath, [obj]):
+            #     packDic["packFiles"].append(fileName)
+            #     om.MGlobal.displayInfo(filePath)
+            pipeline.submit(obj, filePath, versioning=versioning, incremental=incremental)
+        results = pipeline.results()
+    packDic["packFiles"] = [os.path.basename(result.file_path) for result in _report_export(results)]
     if versioning:
         if os.path.exists(packPath):
             with open(packPath) as json_file:
@@ -80,65 +115,89 @@ def exportSkinPack(packPath, objs, versioning=False, file_ext=".gSkin"):
         with open(packPath, 'w') as f:
             f.write(data_string + "\n")
         om.MGlobal.displayInfo("Skin Pack exported: " + packPath)
+        library_index.invalidate(packDic["rootPath"])
     else:
         om.MGlobal.displayWarning("None of the selected objects have Skin Cluster. "
                                   "Skin Pack export aborted.")
 
 
 @timing
-def exportSkin(folder_path, objs, versioning=False, file_ext=".npySkin", prevent_unsupported_method=True):
+def exportSkin(folder_path, objs, versioning=False, file_ext=".npySkin", prevent_unsupported_method=True,
+               incremental=False, precision="float64", index="int32", codec=None, chunk_size=None):
     if not os.path.exists(folder_path):
         return om.MGlobal.displayWarning("skin folder does not exist!")
     debug("file_ext: {}".format(file_ext))
-    for each in objs:
-        filePath = folder_path + "/" + each + file_ext
-        if prevent_unsupported_method:
-            skinCluster = getSkinCluster(each)
-            skinMethod = cmds.getAttr(skinCluster + ".skinningMethod")
-            print(skinMethod)
-            if skinMethod < 0:
-                cmds.setAttr(skinCluster + ".skinningMethod", 0)
-        if versioning:
-            versionFile(filePath)
-        if file_ext == ".npySkin":
-            npySaveSkin(each, filePath)
-        else:
-            print("something went wrong")
-            return
+    if file_ext != ".npySkin":
+        print("something went wrong")
+        return
+    with skinCluster_batch(report=debug), ExportPipeline(precision=precision, index=index, codec=codec,
+                                             chunk_size=chunk_size) as pipeline:
+        for each in objs:
+            filePath = folder_path + "/" + each + file_ext
+            if prevent_unsupported_method:
+                skinCluster = getSkinCluster(each)
+                fnSkinCluster = handle_cache.fn(skinCluster, om2Anim.MFnSkinCluster)
+                settings = SkinClusterSettings.read(fnSkinCluster)
+                print(settings.skinningMethod)
+                if settings.skinningMethod < 0:
+                    settings.skinningMethod = 0
+                    settings.write(fnSkinCluster, names=("skinningMethod",))
+            pipeline.submit(each, filePath, versioning=versioning, incremental=incremental)
+        results = pipeline.results()
+    _report_export(results)
+    library_index.invalidate(folder_path)
     om.MGlobal.displayInfo("")
     om.MGlobal.displayInfo("= DONE ==============================================")
 
 
+def readSkinPackMembers(packPath):
+    """ mesh names of a skin pack, the json listing the member files """
+    with open(packPath) as f:
+        return [str(i).split(".")[0] for i in json.load(f)["packFiles"]]
+
+
 @timing
 def importSkin(folderPath, objs=[], file_ext='.npySkin', createMissingJoints=False, skipAlreadySkinned=True):
     if not os.path.exists(folderPath):
         return om.MGlobal.displayWarning("skin folder does not exist")
     debug("file_ext: {}".format(file_ext))
+    if file_ext != ".npySkin":
+        print("something went wrong")
+        return
     skipped = []
     not_in_scene = []
-    for each in os.listdir(folderPath):
-        if not each.endswith(file_ext):
-            continue
-        meshName = each.split(".")[0]
-        if not objs or (meshName in objs):
-            if skipAlreadySkinned and getSkinCluster(meshName):
-                skipped.append(meshName)
+    # ...plan first (file order and skip rules), only the planned files are read
+    plan = []
+    # ...one scene query for the already skinned checks, one lookup per node
+    with skinCluster_batch(report=debug):
+        for each in os.listdir(folderPath):
+            if not each.endswith(file_ext):
                 continue
-            if not cmds.objExists(meshName):
-                not_in_scene.append(meshName)
+            meshName = each.split(".")[0]
+            if not objs or (meshName in objs):
+                if skipAlreadySkinned and getSkinCluster(meshName):
+                    skipped.append(meshName)
+                    continue
+                if not cmds.objExists(meshName):
+                    not_in_scene.append(meshName)
+                    continue
+                # TODO: not doing missing joint check for now
+                # if createMissingJoints:
+                #     d = json.load(open(folderPath + "/" + each))
+                #     for jnt in d["objDDic"][0]["weights"].keys():
+                #         if not pm.objExists(jnt):
+                #             pm.select(d=True)
+                #             pm.joint(n=jnt)
+                plan.append(folderPath + "/" + each)
+        # ...the next files are read and expanded in the background, this thread only rebinds
+        influenceTable = InfluenceTable()
+        for filePath, future in read_ahead(plan):
+            try:
+                cSkinClusterIO = future.result()
+            except Exception as e:
+                om.MGlobal.displayWarning("{}: read failed: {}".format(filePath, e))
                 continue
-            # TODO: not doing missing joint check for now
-            # if createMissingJoints:
-            #     d = json.load(open(folderPath + "/" + each))
-            #     for jnt in d["objDDic"][0]["weights"].keys():
-            #         if not pm.objExists(jnt):
-            #             pm.select(d=True)
-            #             pm.joint(n=jnt)
-            if file_ext == ".npySkin":
-                npyLoadSkin(folderPath + "/" + each)
-            else:
-                print("something went wrong")
-                return
+            cSkinClusterIO.apply(createMissingJoints=True, influenceTable=influenceTable)
     if skipped or not_in_scene:
         print("")
     if skipped:
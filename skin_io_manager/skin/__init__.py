@@ -1,5 +1,248 @@
+from contextlib import contextmanager
+
 from maya import cmds
 
+GEOMETRY_NODE_TYPES = ["mesh", "nurbsSurface", "nurbsCurve"]
+# ...deformers followed between a skinCluster and its shape (deltaMush, blendShape after the skin...)
+MAX_DEFORMER_DEPTH = 16
+
+
+class SkinClusterCache(object):
+    """ shape -> skinCluster map of the scene, built with one ls -type skinCluster and one
+    listConnections of their outputGeometry
+
+    The map is only used inside a batch() or while the invalidation hooks are installed, the
+    hooks drop it whenever the scene changes. Otherwise a lookup queries the history of its
+    shape only. The hooks are installed explicitly (install_hooks, the Skin IO window does
+    while it is open) and removed once every user released them. Hooks are pluggable, a hook
+    is a callable taking the invalidate callback and returning a callable that removes it again.
+    """
+
+    def __init__(self):
+        self._map = None
+        self._batch = 0
+        self.hooks = [_maya_message_hook]
+        self._removers = None
+        self._users = 0
+
+    def install_hooks(self):
+        """ install the invalidation hooks for one more user (a window)
+
+        Returns:
+            callable: releases the hooks of this user, they are removed with the last user.
+                Calling it again does nothing, it can be connected to a close and a destroyed
+                signal both
+        """
+        if self._removers is None:
+            self._removers = []
+            for hook in self.hooks:
+                try:
+                    self._removers.append(hook(self.invalidate))
+                except Exception:
+                    cmds.warning("skinCluster cache hook {} failed, cache only used in batches".format(hook))
+        self._users += 1
+        released = []
+
+        def release(*args):
+            if released:
+                return
+            released.append(True)
+            self._users -= 1
+            if not self._users:
+                self.remove_hooks()
+
+        return release
+
+    def add_hook(self, hook):
+        """ plug in another invalidation source (a file watcher, a custom scene callback...) """
+        self.hooks.append(hook)
+        if self._removers is not None:
+            self._removers.append(hook(self.invalidate))
+
+    def remove_hooks(self):
+        """ remove the hooks whatever their users """
+        for remove in self._removers or []:
+            remove()
+        self._removers = None
+        self._users = 0
+        self.invalidate()
+
+    def invalidate(self, *args):
+        self._map = None
+
+    @contextmanager
+    def batch(self):
+        """ share one scene query between the lookups of a batch operation """
+        self._batch += 1
+        try:
+            yield self
+        finally:
+            self._batch -= 1
+            if not self._batch and not self._removers:
+                self.invalidate()
+
+    def _build(self):
+        skinClusters = {}
+        # ...node whose outputGeometry is followed -> the skinCluster it comes from, the shape is
+        #    usually connected directly, a deformer after the skin costs one more query
+        frontier = {skinCluster: skinCluster for skinCluster in cmds.ls(type="skinCluster") or []}
+        for _ in range(MAX_DEFORMER_DEPTH):
+            if not frontier:
+                break
+            pairs = cmds.listConnections(["%s.outputGeometry" % node for node in frontier], source=False,
+                                         destination=True, connections=True, shapes=True) or []
+            # ...like skinCluster -q -geometry [0], the first output geometry (listed in index order)
+            first = {}
+            for plug, destination in zip(pairs[::2], pairs[1::2]):
+                first.setdefault(plug.split(".")[0], destination)
+            nodeTypes = cmds.ls(list(first.values()), showType=True) or []
+            nodeTypes = dict(zip(nodeTypes[::2], nodeTypes[1::2]))
+            deformers = set(cmds.ls(list(first.values()), type=["geometryFilter", "groupParts"]) or [])
+            nextFrontier = {}
+            for node, destination in first.items():
+                if nodeTypes.get(destination) in GEOMETRY_NODE_TYPES:
+                    skinClusters.setdefault(destination, []).append(frontier[node])
+                elif destination in deformers:
+                    nextFrontier.setdefault(destination, frontier[node])
+            frontier = nextFrontier
+        return skinClusters
+
+    @staticmethod
+    def _query(shape):
+        """ skinClusters of shape found in its history, the lookup of a single shape """
+        if cmds.nodeType(shape) not in GEOMETRY_NODE_TYPES:
+            return []
+        return [node for node in cmds.ls(cmds.listHistory(shape) or [], type="skinCluster") or []
+                if (cmds.skinCluster(node, query=True, geometry=True) or [None])[0] == shape]
+
+    def skinClusters(self, shape):
+        """ skinClusters whose (first) output geometry is shape """
+        if not (self._batch or self._removers):
+            return self._query(shape)
+        if self._map is None:
+            self._map = self._build()
+        return self._map.get(shape, [])
+
+
+def _maya_message_hook(invalidate):
+    """ drop the map when a skinCluster is created or deleted, on a geometry connection, when a
+    shape or skinCluster is renamed (the map is keyed and valued by names) and on scene load """
+    import maya.api.OpenMaya as om2
+
+    def renamed(node, prevName, clientData=None):
+        if node.hasFn(om2.MFn.kDagNode) or node.hasFn(om2.MFn.kSkinClusterFilter):
+            invalidate()
+
+    ids = [om2.MDGMessage.addNodeAddedCallback(invalidate, "skinCluster"),
+           om2.MDGMessage.addNodeRemovedCallback(invalidate, "skinCluster"),
+           om2.MSceneMessage.addCallback(om2.MSceneMessage.kAfterOpen, invalidate),
+           om2.MSceneMessage.addCallback(om2.MSceneMessage.kAfterNew, invalidate),
+           om2.MDGMessage.addConnectionCallback(
+               lambda srcPlug, destPlug, made, clientData=None:
+               srcPlug.node().hasFn(om2.MFn.kGeometryFilt) and invalidate()),
+           # ...a null node watches the renames of every node
+           om2.MNodeMessage.addNameChangedCallback(om2.MObject.kNullObj, renamed)]
+
+    def remove():
+        om2.MMessage.removeCallbacks(ids)
+
+    return remove
+
+
+class HandleCache(object):
+    """ MObjects and API 2.0 function sets of the nodes used by a batch operation
+
+    A name is looked up once per batch, the function sets (MFnSkinCluster, SkinGeometry...)
+    are built once per node, keyed by MObjectHandle hash code. Every hit checks the handle is
+    the same node, still valid and the node still has that name, a deleted or renamed node is
+    looked up again. Outside of a batch nothing is kept.
+    """
+
+    def __init__(self):
+        self._batch = 0
+        self._objects = {}
+        self._fns = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _valid(handle, name):
+        import maya.api.OpenMaya as om2
+
+        if not (handle.isValid() and handle.isAlive()):
+            return False
+        return name is None or om2.MFnDependencyNode(handle.object()).name() == name.split("|")[-1]
+
+    def mobject(self, name):
+        """ om2 MObject of a node name """
+        import maya.api.OpenMaya as om2
+
+        handle = self._objects.get(name)
+        if handle is not None and self._valid(handle, name):
+            self.hits += 1
+            return handle.object()
+        self.misses += 1
+        selList = om2.MSelectionList()
+        selList.add(name)
+        obj = selList.getDependNode(0)
+        if self._batch:
+            self._objects[name] = om2.MObjectHandle(obj)
+        return obj
+
+    def fn(self, node, fnType):
+        """ fnType(MObject) of a node name or MObject, built once per node and batch """
+        import maya.api.OpenMaya as om2
+
+        obj = self.mobject(node) if isinstance(node, str) else node
+        handle = om2.MObjectHandle(obj)
+        key = (handle.hashCode(), fnType)
+        cached = self._fns.get(key)
+        # ...hash codes can collide, the cached handle has to be the same node
+        if cached is not None and cached[0] == handle and self._valid(cached[0], None):
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        fn = fnType(obj)
+        if self._batch:
+            self._fns[key] = (handle, fn)
+        return fn
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
+
+    def report(self):
+        return "handle cache: {} hits, {} misses, hit rate {:.0%}".format(self.hits, self.misses, self.hit_rate())
+
+    def clear(self):
+        self._objects = {}
+        self._fns = {}
+        self.hits = self.misses = 0
+
+
+skinCluster_cache = SkinClusterCache()
+handle_cache = HandleCache()
+
+
+@contextmanager
+def skinCluster_batch(report=None):
+    """ with skinCluster_batch(): ..., getSkinCluster calls inside share one scene query and the
+    API lookups share handle_cache
+
+    Args:
+        report(callable): called with the handle cache hit rate when the outermost batch ends
+    """
+    handle_cache._batch += 1
+    try:
+        with skinCluster_cache.batch():
+            yield
+    finally:
+        handle_cache._batch -= 1
+        if not handle_cache._batch:
+            if report is not None:
+                report(handle_cache.report())
+            handle_cache.clear()
+
 
 def getSkinCluster(obj, first_SC=False):
     skinCluster = None
@@ -9,16 +252,11 @@ def getSkinCluster(obj, first_SC=False):
             shapes = cmds.listRelatives(obj, shapes=True)
             if shapes:
                 for shape in shapes:
-                    if cmds.nodeType(shape) in ["mesh", "nurbsSurface", "nurbsCurve"]:
-                        history = cmds.listHistory(shape)
-                        if history:
-                            for node in history:
-                                if cmds.nodeType(node) == "skinCluster":
-                                    geometry = cmds.skinCluster(node, query=True, geometry=True)
-                                    if geometry and geometry[0] == shape:
-                                        skinCluster = node
-                                        if first_SC:
-                                            return skinCluster
+                    skinClusters = skinCluster_cache.skinClusters(shape)
+                    if skinClusters:
+                        skinCluster = skinClusters[0]
+                        if first_SC:
+                            return skinCluster
         except Exception:
             cmds.warning("%s: is not supported." % obj)
 
@@ -0,0 +1,206 @@
+""" headless benchmarks for the numpy skin weight code, run them from the script editor:
+
+    from skin_io_manager.skin import npy_benchmark
+    npy_benchmark.bench_compress_weightData()
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from . import npy_container
+from .npy_weights import compress_weights, encode_weights
+
+
+def make_dense_weights(vtxCount, infCount, maxInfluences=4, seed=0):
+    """ build a flat, normalized (vtx * inf) weights array like getWeights returns """
+    rng = np.random.default_rng(seed)
+    weights = np.zeros((vtxCount, infCount), dtype="float64")
+    rows = np.repeat(np.arange(vtxCount), maxInfluences)
+    cols = rng.integers(0, infCount, size=vtxCount * maxInfluences)
+    weights[rows, cols] = rng.random(vtxCount * maxInfluences)
+    weights /= weights.sum(axis=1, keepdims=True)
+    return weights.ravel()
+
+
+def _legacy_compress_weightData(weights_Array, infCount):
+    """ the original per-float loop of SkinClusterIO.compress_weightData, kept as reference """
+    weightsNonZero_Array = []
+    infCounter = 0
+    infMap_Chunk = []
+    infMap_ChunkCount = 0
+    vertSplit_Array = [infMap_ChunkCount]
+    infMap_Array = []
+
+    for w in weights_Array:
+        if w != 0.0:
+            weightsNonZero_Array.append(w)
+            infMap_Chunk.append(infCounter)
+
+        infCounter += 1
+        if infCounter == infCount:
+            infCounter = 0
+            infMap_Array.extend(infMap_Chunk)
+            infMap_ChunkCount = len(infMap_Chunk) + infMap_ChunkCount
+            vertSplit_Array.append(infMap_ChunkCount)
+            infMap_Chunk = []
+
+    return weightsNonZero_Array, infMap_Array, vertSplit_Array
+
+
+def _best_of(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        ts = time.time()
+        result = func()
+        te = time.time() - ts
+        best = te if best is None else min(best, te)
+    return best, result
+
+
+def bench_compress_weightData(vtxCount=20000, infCount=120, maxInfluences=4, repeat=3):
+    """ compare the legacy loop with the vectorized compressor and check the output is byte-identical
+
+    Returns:
+        dict: timings in seconds and the speedup factor
+    """
+    weights_Array = make_dense_weights(vtxCount, infCount, maxInfluences)
+
+    legacy_time, legacy = _best_of(lambda: _legacy_compress_weightData(weights_Array, infCount), 1)
+    fast_time, fast = _best_of(lambda: compress_weights(weights_Array, infCount), repeat)
+
+    # ...the legacy lists went through np.array() in get_data, the values and the dtype (which
+    #    depends on the platform and numpy version) must both match
+    for name, old, new in zip(("weightsNonZero_Array", "infMap_Array", "vertSplit_Array"), legacy, fast):
+        old = np.array(old)
+        if old.dtype != new.dtype:
+            raise AssertionError("{} dtype {} differs from the legacy {}".format(name, new.dtype, old.dtype))
+        if old.tobytes() != new.tobytes():
+            raise AssertionError("{} differs from the legacy output".format(name))
+
+    result = dict(vtxCount=vtxCount,
+                  infCount=infCount,
+                  legacy=legacy_time,
+                  vectorized=fast_time,
+                  speedup=legacy_time / max(fast_time, 1e-9))
+    print("compress_weightData {vtxCount} vtx x {infCount} inf: "
+          "legacy {legacy:.4f} sec, vectorized {vectorized:.4f} sec, x{speedup:.1f}".format(**result))
+    return result
+
+
+class _FakeApi2(object):
+    """ stand-in for maya.api.OpenMaya, the mArrays are plain lists """
+
+    class MDoubleArray(list):
+        pass
+
+    class MIntArray(list):
+        pass
+
+
+def _fake_buffer_array(typecode):
+    """ an mArray type over array.array, it exposes its memory like the buffer path expects """
+    import array
+
+    class FakeArray(array.array):
+        def __new__(cls, *args):
+            if len(args) == 2:
+                # ...mArray(length, value), built from the bytes of one element
+                return array.array.__new__(cls, typecode, array.array(typecode, [args[1]]).tobytes() * args[0])
+            return array.array.__new__(cls, typecode, *args)
+
+    return FakeArray
+
+
+class _FakeBufferApi2(object):
+    """ stand-in for maya.api.OpenMaya, the mArrays expose a writable buffer """
+
+    MDoubleArray = _fake_buffer_array("d")
+    MIntArray = _fake_buffer_array("i")
+
+
+def bench_weight_transport(vtxCount=100000, infCount=60, maxInfluences=4, repeat=3):
+    """ compare per-element MDoubleArray building with the bulk WeightTransport conversion
+
+    Runs outside of maya, the mArrays are faked so only the python side cost is measured. The bulk
+    timing goes through the buffer path, the list timing through the fallback for mArrays without one.
+
+    Returns:
+        dict: timings in seconds and the speedup factor
+    """
+    from .npy_transport import WeightTransport
+
+    transport = WeightTransport(om2=_FakeBufferApi2)
+    fallback = WeightTransport(om2=_FakeApi2)
+    weights_Array = make_dense_weights(vtxCount, infCount, maxInfluences)
+
+    def legacy():
+        mArray = _FakeApi2.MDoubleArray()
+        for w in weights_Array:
+            mArray.append(w)
+        return mArray
+
+    legacy_time, legacy_mArray = _best_of(legacy, 1)
+    list_time, list_mArray = _best_of(lambda: fallback.to_mDoubleArray(weights_Array), repeat)
+    fast_time, fast_mArray = _best_of(lambda: transport.to_mDoubleArray(weights_Array), repeat)
+    if list(legacy_mArray) != list(fast_mArray) or list(legacy_mArray) != list(list_mArray):
+        raise AssertionError("MDoubleArray content differs from the legacy output")
+    back_time, back = _best_of(lambda: transport.from_mArray(fast_mArray), repeat)
+
+    result = dict(vtxCount=vtxCount,
+                  infCount=infCount,
+                  legacy=legacy_time,
+                  list=list_time,
+                  bulk=fast_time,
+                  readback=back_time,
+                  speedup=legacy_time / max(fast_time, 1e-9))
+    print("weight transport {vtxCount} vtx x {infCount} inf: "
+          "legacy {legacy:.4f} sec, list {list:.4f} sec, bulk {bulk:.4f} sec (x{speedup:.1f}), "
+          "read back {readback:.4f} sec".format(**result))
+    return result
+
+
+def bench_codecs(vtxCounts=(100000, 1000000), infCount=120, maxInfluences=4, precision="uint16", index="int16",
+                 codecs=None, repeat=1):
+    """ size ratio and encode/decode throughput of the section codecs on synthetic skins
+
+    The throughput is of the raw (uncompressed) section bytes, written to and read back from a
+    temp file, so the numbers include the local disk. For a network share multiply the stored
+    size by its bandwidth and add it to the times.
+
+    Returns:
+        list: one dict per (vtxCount, codec)
+    """
+    codecs = codecs or [npy_container.NO_CODEC] + sorted(npy_container.CODECS)
+    results = []
+    for vtxCount in vtxCounts:
+        weights_Array = make_dense_weights(vtxCount, infCount, maxInfluences)
+        arrays = encode_weights(*compress_weights(weights_Array, infCount), precision=precision, index=index)
+        sections = dict(zip(("weightsNonZero_Array", "infMap_Array", "vertSplit_Array"), arrays))
+        rawBytes = sum(array.nbytes for array in sections.values())
+        del weights_Array
+
+        fd, file_path = tempfile.mkstemp(suffix=".npySkin")
+        os.close(fd)
+        try:
+            for codec in codecs:
+                write_time, _ = _best_of(lambda: npy_container.write_container(file_path, {}, sections,
+                                                                               codec=codec), repeat)
+                header = npy_container.read_header(file_path)
+                read_time, _ = _best_of(lambda: npy_container.read_sections(file_path, header, mmap=False),
+                                        repeat)
+                size = os.path.getsize(file_path)
+                result = dict(vtxCount=vtxCount,
+                              codec=codec,
+                              size=size,
+                              ratio=rawBytes / float(size),
+                              encode=rawBytes / 1e6 / max(write_time, 1e-9),
+                              decode=rawBytes / 1e6 / max(read_time, 1e-9))
+                results.append(result)
+                print("{codec:>5} {vtxCount} vtx: {size} bytes, ratio x{ratio:.2f}, "
+                      "encode {encode:.1f} MB/s, decode {decode:.1f} MB/s".format(**result))
+        finally:
+            os.remove(file_path)
+    return results
@@ -0,0 +1,287 @@
+""" typed, memory-mappable container used by the .npySkin files
+
+layout (all offsets are relative to the start of the container):
+
+    preamble  : magic(8s) formatVersion(uint32) flags(uint32) headerOffset(uint64) headerLength(uint64)
+    sections  : raw little endian arrays, every section starts on an ALIGNMENT boundary
+    header    : utf-8 json, {"formatVersion", "meta", "arrays", "sections": {name: {dtype, shape, offset, nbytes}}}
+
+The json header is written last so sections can be streamed, the fixed size preamble points at it.
+Files written before this container (np.save/pickle of a python list) are format version 1.
+
+A section can be compressed with one of the CODECS, its header entry then also has the codec
+name and rawBytes (nbytes is the stored size). The header itself is never compressed, reading
+it stays one small read. Compressed sections are read into memory, not memory-mapped.
+"""
+import bz2
+import json
+import lzma
+import os
+import struct
+import tempfile
+import threading
+import zlib
+
+import numpy as np
+
+MAGIC = b"NPYSKIN\x00"
+LEGACY_FORMAT_VERSION = 1
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct("<8sIIQQ")
+
+
+class Codec(object):
+    """ a section compression codec, compressor() returns an object with compress(bytes) and flush() """
+
+    def __init__(self, compressor, decompress):
+        self.compressor = compressor
+        self.decompress = decompress
+
+
+CODECS = {"zlib": Codec(lambda: zlib.compressobj(6), zlib.decompress),
+          "lzma": Codec(lambda: lzma.LZMACompressor(preset=6), lzma.decompress),
+          "bz2": Codec(lambda: bz2.BZ2Compressor(9), bz2.decompress)}
+NO_CODEC = "none"
+
+
+def registerCodec(name, codec):
+    """ make a Codec available to the writers under name, readers need the same registration """
+    CODECS[name] = codec
+
+
+def _get_codec(name):
+    if name in (None, NO_CODEC):
+        return None
+    if name not in CODECS:
+        raise ValueError("unknown section codec {}, expected one of {}".format(name, [NO_CODEC] + sorted(CODECS)))
+    return CODECS[name]
+
+
+def _pad(fh, base):
+    pad = -(fh.tell() - base) % ALIGNMENT
+    if pad:
+        fh.write(b"\x00" * pad)
+
+
+def _to_json_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+def is_container(file_path, offset=0):
+    with open(file_path, "rb") as fh:
+        fh.seek(offset)
+        return fh.read(len(MAGIC)) == MAGIC
+
+
+class SectionSpool(object):
+    """ a 1d section built chunk by chunk in a temp file, so it is never in memory as a whole
+
+    Written like an array section (ContainerWriter.add_section streams it in blocks). The temp
+    file is deleted on close, a spool is also a context manager.
+    """
+
+    def __init__(self, dtype):
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.rows = 0
+        self.fh = tempfile.TemporaryFile()
+
+    @property
+    def shape(self):
+        return (self.rows,)
+
+    @property
+    def nbytes(self):
+        return self.rows * self.dtype.itemsize
+
+    def __len__(self):
+        return self.rows
+
+    def append(self, array):
+        array = np.ascontiguousarray(array, dtype=self.dtype).ravel()
+        self.rows += len(array)
+        self.fh.write(array.tobytes())
+
+    def blocks(self, blockBytes=1 << 22):
+        """ yield the content as arrays of at most blockBytes """
+        self.fh.flush()
+        self.fh.seek(0)
+        blockBytes -= blockBytes % self.dtype.itemsize
+        remaining = self.nbytes
+        while remaining:
+            data = self.fh.read(min(blockBytes, remaining))
+            remaining -= len(data)
+            yield np.frombuffer(data, dtype=self.dtype)
+        self.fh.seek(0, 2)
+
+    def close(self):
+        self.fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ContainerWriter(object):
+    """ write a container into an open binary file handle, starting at the current position
+
+    Args:
+        codec(str): compress the sections with this CODECS entry, none by default
+    """
+
+    def __init__(self, fh, codec=None):
+        self.fh = fh
+        self.base = fh.tell()
+        self.codec = codec
+        self.sections = {}
+        self._current = None
+        fh.write(b"\x00" * _PREAMBLE.size)
+        _pad(fh, self.base)
+
+    def add_section(self, name, array, codec=None):
+        if isinstance(array, SectionSpool):
+            self.begin_section(name, array.dtype, codec=codec)
+            for block in array.blocks():
+                self.append(block)
+            return self.end_section()
+        array = np.asarray(array)
+        self.begin_section(name, array.dtype, codec=codec)
+        self.append(array)
+        self.end_section(array.shape[1:])
+
+    def begin_section(self, name, dtype, codec=None):
+        """
+        Args:
+            codec(str): codec of this section, the writer codec if None
+        """
+        if self._current is not None:
+            raise RuntimeError("section {} is still open".format(self._current["name"]))
+        codec = self.codec if codec is None else codec
+        impl = _get_codec(codec)
+        _pad(self.fh, self.base)
+        self._current = dict(name=name,
+                             dtype=np.dtype(dtype).newbyteorder("<").str,
+                             offset=self.fh.tell() - self.base,
+                             rows=0,
+                             rawBytes=0,
+                             codec=codec if impl else None,
+                             compressor=impl.compressor() if impl else None)
+
+    def append(self, array):
+        """ append a chunk to the open section """
+        current = self._current
+        array = np.ascontiguousarray(array, dtype=current["dtype"])
+        current["rows"] += len(array) if array.ndim else 1
+        current["rawBytes"] += array.nbytes
+        data = array.tobytes()
+        if current["compressor"] is not None:
+            data = current["compressor"].compress(data)
+        self.fh.write(data)
+
+    def end_section(self, rowShape=()):
+        current, self._current = self._current, None
+        if current["compressor"] is not None:
+            self.fh.write(current["compressor"].flush())
+        section = dict(dtype=current["dtype"],
+                       shape=[current["rows"]] + list(rowShape),
+                       offset=current["offset"],
+                       nbytes=self.fh.tell() - self.base - current["offset"])
+        if current["codec"]:
+            section.update(codec=current["codec"], rawBytes=current["rawBytes"])
+        self.sections[current["name"]] = section
+
+    def close(self, meta, arrays=()):
+        """ write the json header and patch the preamble, returns the container length in bytes """
+        _pad(self.fh, self.base)
+        header = dict(formatVersion=FORMAT_VERSION,
+                      meta={k: _to_json_value(v) for k, v in meta.items()},
+                      arrays=list(arrays),
+                      sections=self.sections)
+        headerOffset = self.fh.tell() - self.base
+        data = json.dumps(header, sort_keys=True).encode("utf-8")
+        self.fh.write(data)
+        end = self.fh.tell()
+
+        self.fh.seek(self.base)
+        self.fh.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, 0, headerOffset, len(data)))
+        self.fh.seek(end)
+        return end - self.base
+
+
+def write_container(file_path, meta, sections, arrays=(), codec=None):
+    """ written to a temp file next to file_path and swapped in, a failed write leaves the old file
+
+    Args:
+        file_path(str): output file
+        meta(dict): json serializable values (numpy scalars/arrays are converted)
+        sections(dict): name -> numpy array, stored as typed binary sections
+        arrays(list): meta keys that should be read back as numpy arrays
+        codec(str or dict): section codec, or name -> codec of the sections
+    """
+    codecs = codec if isinstance(codec, dict) else {}
+    tempPath = "%s.%d.%d.tmp" % (file_path, os.getpid(), threading.current_thread().ident)
+    try:
+        with open(tempPath, "wb") as fh:
+            writer = ContainerWriter(fh, codec=None if isinstance(codec, dict) else codec)
+            for name, array in sections.items():
+                writer.add_section(name, array, codec=codecs.get(name))
+            writer.close(meta, arrays)
+        os.replace(tempPath, file_path)
+    finally:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+
+
+def read_header(file_path, offset=0):
+    """ read the preamble and the json header only, no section data is touched """
+    with open(file_path, "rb") as fh:
+        fh.seek(offset)
+        magic, version, flags, headerOffset, headerLength = _PREAMBLE.unpack(fh.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError("{} is not a skin container".format(file_path))
+        fh.seek(offset + headerOffset)
+        header = json.loads(fh.read(headerLength).decode("utf-8"))
+    header["formatVersion"] = version
+    return header
+
+
+def read_sections(file_path, header, names=None, mmap=True, offset=0):
+    """
+    Args:
+        file_path(str): container file
+        header(dict): as returned by read_header
+        names(list): sections to read, all of them if None
+        mmap(bool): memory-map the sections instead of reading them into memory
+        offset(int): start of the container inside the file
+
+    Returns:
+        dict: name -> numpy array
+    """
+    sections = header["sections"]
+    names = sections.keys() if names is None else names
+    result = {}
+    with open(file_path, "rb") as fh:
+        for name in names:
+            section = sections[name]
+            dtype = np.dtype(section["dtype"])
+            shape = tuple(section["shape"])
+            if not section["nbytes"]:
+                result[name] = np.empty(shape, dtype=dtype)
+            elif section.get("codec"):
+                fh.seek(offset + section["offset"])
+                data = _get_codec(section["codec"]).decompress(fh.read(section["nbytes"]))
+                result[name] = np.frombuffer(data, dtype=dtype).reshape(shape)
+            elif mmap:
+                result[name] = np.memmap(file_path, dtype=dtype, mode="r",
+                                         offset=offset + section["offset"], shape=shape)
+            else:
+                fh.seek(offset + section["offset"])
+                result[name] = np.frombuffer(fh.read(section["nbytes"]), dtype=dtype).reshape(shape)
+    return result
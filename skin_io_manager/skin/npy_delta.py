@@ -0,0 +1,140 @@
+""" delta codec for .npySkin versions
+
+A delta stores a skin container relative to a base container: the CSR rows (vertices) whose
+weights or influences changed, the other sections that changed and the complete json meta of
+the target. Decoding patches the base rows and rewrites the target container byte for byte,
+so the version keeps its content hash.
+
+Only containers with the same vertex count are delta encoded, anything else (legacy pickled
+files, topology changes) is versioned as a full copy.
+"""
+import numpy as np
+
+from . import npy_container
+
+CSR_SECTIONS = ("weightsNonZero_Array", "infMap_Array", "vertSplit_Array")
+
+
+def _read(file_path):
+    header = npy_container.read_header(file_path)
+    return header, npy_container.read_sections(file_path, header)
+
+
+def _row_positions(starts, lengths):
+    """ flat element positions of the rows starting at starts with the given lengths """
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype="int64")
+    offsets = np.arange(total, dtype="int64") - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts.astype("int64"), lengths) + offsets
+
+
+def changed_rows(base_split, base_weights, base_infMap, split, weights, infMap):
+    """ vertex ids whose CSR row differs between two skins of the same vertex count """
+    base_lengths = np.diff(base_split.astype("int64"))
+    lengths = np.diff(split.astype("int64"))
+    changed = base_lengths != lengths
+
+    same = np.flatnonzero(~changed)
+    same_lengths = lengths[same]
+    base_pos = _row_positions(base_split[same], same_lengths)
+    pos = _row_positions(split[same], same_lengths)
+    mismatch = (np.asarray(weights)[pos] != np.asarray(base_weights)[base_pos]) | \
+               (np.asarray(infMap)[pos] != np.asarray(base_infMap)[base_pos])
+    changed[np.repeat(same, same_lengths)[mismatch]] = True
+    return np.flatnonzero(changed)
+
+
+def encode(base_path, target_path, delta_path):
+    """ write the delta of target_path against base_path
+
+    Returns:
+        bool: False if the pair can not be delta encoded, nothing is written then
+    """
+    if not (npy_container.is_container(base_path) and npy_container.is_container(target_path)):
+        return False
+    base_header, base = _read(base_path)
+    header, target = _read(target_path)
+    if not all(name in base and name in target for name in CSR_SECTIONS):
+        return False
+    if len(base["vertSplit_Array"]) != len(target["vertSplit_Array"]):
+        return False
+
+    split = target["vertSplit_Array"]
+    rows = changed_rows(base["vertSplit_Array"], base["weightsNonZero_Array"], base["infMap_Array"],
+                        split, target["weightsNonZero_Array"], target["infMap_Array"])
+    lengths = np.diff(split.astype("int64"))[rows]
+    pos = _row_positions(split[rows], lengths)
+
+    sections = dict(rowIds=rows.astype("int32"),
+                    rowLengths=lengths.astype("int32"),
+                    rowWeights=np.asarray(target["weightsNonZero_Array"])[pos],
+                    rowInfMap=np.asarray(target["infMap_Array"])[pos])
+    replaced = []
+    for name, array in target.items():
+        if name in CSR_SECTIONS:
+            continue
+        base_array = base.get(name)
+        if base_array is None or base_array.dtype != array.dtype or base_array.shape != array.shape \
+                or not np.array_equal(base_array, array):
+            sections["section:" + name] = array
+            replaced.append(name)
+
+    # ...the header keys are sorted, the sections are rewritten in their file order
+    order = sorted(header["sections"], key=lambda name: header["sections"][name]["offset"])
+    meta = dict(target=dict(meta=header["meta"], arrays=header["arrays"]),
+                sectionOrder=order,
+                sectionDtypes={name: s["dtype"] for name, s in header["sections"].items()},
+                sectionCodecs={name: s.get("codec") for name, s in header["sections"].items()},
+                replaced=replaced)
+    npy_container.write_container(delta_path, meta, sections)
+    return True
+
+
+def decode(base_path, delta_path, out_path):
+    """ rebuild the target container of a delta from its base """
+    _, base = _read(base_path)
+    delta_header, delta = _read(delta_path)
+    meta = delta_header["meta"]
+    dtypes = meta["sectionDtypes"]
+
+    base_split = base["vertSplit_Array"].astype("int64")
+    lengths = np.diff(base_split)
+    rows = delta["rowIds"].astype("int64")
+    row_lengths = delta["rowLengths"].astype("int64")
+    lengths[rows] = row_lengths
+    split = np.zeros(len(lengths) + 1, dtype="int64")
+    np.cumsum(lengths, out=split[1:])
+
+    # ...unchanged rows are copied from the base, changed ones from the delta
+    keep = np.ones(len(lengths), dtype=bool)
+    keep[rows] = False
+    kept = np.flatnonzero(keep)
+    kept_lengths = lengths[kept]
+    pos = _row_positions(split[kept], kept_lengths)
+    base_pos = _row_positions(base_split[kept], kept_lengths)
+    delta_pos = _row_positions(split[rows], row_lengths)
+
+    sections = {}
+    for name, delta_name in (("weightsNonZero_Array", "rowWeights"), ("infMap_Array", "rowInfMap")):
+        array = np.empty(int(split[-1]), dtype=dtypes[name])
+        array[pos] = base[name][base_pos]
+        array[delta_pos] = delta[delta_name]
+        sections[name] = array
+    sections["vertSplit_Array"] = split.astype(dtypes["vertSplit_Array"])
+    for name in meta["sectionOrder"]:
+        if name in CSR_SECTIONS:
+            continue
+        sections[name] = delta["section:" + name] if name in meta["replaced"] else base[name]
+
+    target = meta["target"]
+    npy_container.write_container(out_path, target["meta"],
+                                  {name: sections[name] for name in meta["sectionOrder"]},
+                                  target["arrays"], codec=meta.get("sectionCodecs", {}))
+
+
+class NpySkinDeltaCodec(object):
+    """ the file_versioning delta codec interface """
+
+    encode = staticmethod(encode)
+    decode = staticmethod(decode)
@@ -0,0 +1,105 @@
+""" resolve skinned geometry through API 2.0: point counts, components and the skinCluster
+
+Everything here is a constant number of API calls whatever the point count, no per vertex
+strings (cmds.ls vtx[*]) or MEL. mesh, nurbsSurface and nurbsCurve shapes are supported, the
+same types getSkinCluster accepts.
+
+    geometry = SkinGeometry("body_geo")
+    geometry.count, geometry.component(), geometry.skinCluster()
+"""
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as om2Anim
+
+GEOMETRY_TYPES = ("mesh", "nurbsSurface", "nurbsCurve")
+
+
+class SkinGeometry(object):
+    """ a deformable shape, given by a shape or transform name, MDagPath or MObject """
+
+    def __init__(self, node):
+        self.dagPath = self._shape_path(node)
+        self.node = self.dagPath.node()
+        if self.node.hasFn(om2.MFn.kMesh):
+            self.type = "mesh"
+            self.count = om2.MFnMesh(self.dagPath).numVertices
+        elif self.node.hasFn(om2.MFn.kNurbsSurface):
+            self.type = "nurbsSurface"
+            fnSurface = om2.MFnNurbsSurface(self.dagPath)
+            self.countU, self.countV = fnSurface.numCVsInU, fnSurface.numCVsInV
+            self.count = self.countU * self.countV
+        elif self.node.hasFn(om2.MFn.kNurbsCurve):
+            self.type = "nurbsCurve"
+            self.count = om2.MFnNurbsCurve(self.dagPath).numCVs
+        else:
+            raise TypeError("{} is not one of {}".format(self.dagPath.partialPathName(), GEOMETRY_TYPES))
+
+    @staticmethod
+    def _shape_path(node):
+        if isinstance(node, om2.MDagPath):
+            dagPath = om2.MDagPath(node)
+        elif isinstance(node, om2.MObject):
+            dagPath = om2.MDagPath.getAPathTo(node)
+        else:
+            selList = om2.MSelectionList()
+            selList.add(node)
+            dagPath = selList.getDagPath(0)
+        if dagPath.apiType() == om2.MFn.kTransform:
+            # ...the first non intermediate shape of a transform
+            for i in range(dagPath.childCount()):
+                child = dagPath.child(i)
+                if child.hasFn(om2.MFn.kShape) and not om2.MFnDagNode(child).isIntermediateObject:
+                    return om2.MDagPath.getAPathTo(child)
+            raise TypeError("{} has no shape".format(dagPath.partialPathName()))
+        return dagPath
+
+    @property
+    def name(self):
+        return self.dagPath.partialPathName()
+
+    def component(self):
+        """ complete component of all the points, without listing them """
+        if self.type == "nurbsSurface":
+            fnComp = om2.MFnDoubleIndexedComponent()
+            component = fnComp.create(om2.MFn.kSurfaceCVComponent)
+            fnComp.setCompleteData(self.countU, self.countV)
+            return component
+        fnComp = om2.MFnSingleIndexedComponent()
+        component = fnComp.create(om2.MFn.kMeshVertComponent if self.type == "mesh" else om2.MFn.kCurveCVComponent)
+        fnComp.setCompleteData(self.count)
+        return component
+
+    def component_range(self, start, end):
+        """ component of the points start to end (exclusive), in weight order """
+        end = min(end, self.count)
+        if self.type == "nurbsSurface":
+            # ...the weights of a surface are u major, point i is cv[i // countV][i % countV]
+            fnComp = om2.MFnDoubleIndexedComponent()
+            component = fnComp.create(om2.MFn.kSurfaceCVComponent)
+            fnComp.addElements([(i // self.countV, i % self.countV) for i in range(start, end)])
+            return component
+        fnComp = om2.MFnSingleIndexedComponent()
+        component = fnComp.create(om2.MFn.kMeshVertComponent if self.type == "mesh" else om2.MFn.kCurveCVComponent)
+        fnComp.addElements(list(range(start, end)))
+        return component
+
+    def skinCluster(self):
+        """
+        Returns:
+            om2.MObject: the skinCluster deforming this shape, None if it is not skinned
+        """
+        it = om2.MItDependencyGraph(self.node, om2.MFn.kSkinClusterFilter,
+                                    om2.MItDependencyGraph.kUpstream,
+                                    om2.MItDependencyGraph.kDepthFirst,
+                                    om2.MItDependencyGraph.kNodeLevel)
+        while not it.isDone():
+            skinCluster = it.currentNode()
+            # ...a skinCluster further up the history can deform another shape
+            outputs = om2Anim.MFnSkinCluster(skinCluster).getOutputGeometry()
+            if any(output == self.node for output in outputs):
+                return skinCluster
+            it.next()
+        return None
+
+    def skinCluster_name(self):
+        skinCluster = self.skinCluster()
+        return om2.MFnDependencyNode(skinCluster).name() if skinCluster is not None else None
@@ -0,0 +1,165 @@
+""" producer/consumer export and import of .npySkin files
+
+The main thread only gathers the weights from maya (SkinClusterIO.gather with compress=False),
+the CSR compression, hashing, versioning and the file write run in a thread pool. submit blocks
+before gathering the next mesh while max_pending meshes, or max_pending_bytes of dense weights,
+wait for a worker, so the dense weights of a big selection are never all in memory at once.
+The workers do not print, their versioning messages are kept in the ExportResult for the main
+thread.
+
+    with ExportPipeline() as pipeline:
+        for mesh in meshes:
+            pipeline.submit(mesh, folder + "/" + mesh + ".npySkin")
+        results = pipeline.results()
+
+On import it is the other way around, read_ahead reads and expands the next files in the pool
+while the main thread applies the current one to the scene:
+
+    for file_path, future in read_ahead(file_paths):
+        future.result().apply()
+"""
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .npy_skinIO import SkinClusterIO
+from .skinIO import npyWriteSkinData
+
+MAX_WORKERS = 4
+PREFETCH = 4
+# ...dense weights gathered but not compressed yet, one mesh over it is gathered at most
+MAX_PENDING_BYTES = 512 * 1024 * 1024
+
+
+class ExportResult(object):
+    __slots__ = ("mesh", "file_path", "written", "error", "messages")
+
+    def __init__(self, mesh, file_path, written=None, error=None):
+        self.mesh = mesh
+        self.file_path = file_path
+        # ...True written, False skipped as unchanged, None nothing to save (or failed)
+        self.written = written
+        self.error = error
+        # ...info messages of the worker, to be displayed on the main thread
+        self.messages = []
+
+
+class ExportPipeline(object):
+
+    def __init__(self, max_workers=MAX_WORKERS, max_pending=None, precision="float64", index="int32",
+                 codec=None, chunk_size=None, max_pending_bytes=MAX_PENDING_BYTES):
+        """
+        Args:
+            max_pending(int): meshes gathered but not written yet, max_workers by default
+            max_pending_bytes(int): dense weight bytes gathered but not written yet
+            precision(str): weight storage, see SkinClusterIO
+            index(str): influence id storage, see SkinClusterIO
+            codec(str): section compression of the written files, see SkinClusterIO
+            chunk_size(int): gather the weights in vertex chunks, see SkinClusterIO.gather
+        """
+        self.precision = precision
+        self.index = index
+        self.codec = codec
+        self.chunk_size = chunk_size
+        self._slots = threading.BoundedSemaphore(max_pending or max_workers)
+        self.max_pending_bytes = max_pending_bytes
+        self._pendingBytes = 0
+        self._pendingBytesChanged = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._jobs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def submit(self, mesh, file_path, versioning=False, incremental=False):
+        """ gather a mesh on the calling (main) thread and queue its write """
+        # ...backpressure, wait for a worker before gathering the next mesh
+        self._slots.acquire()
+        with self._pendingBytesChanged:
+            while self._pendingBytes >= self.max_pending_bytes:
+                self._pendingBytesChanged.wait()
+        result = ExportResult(mesh, file_path)
+        try:
+            cSkinClusterIO = SkinClusterIO(precision=self.precision, index=self.index, codec=self.codec)
+            data = cSkinClusterIO.gather(mesh, compress=False, chunk_size=self.chunk_size)
+        except Exception:
+            self._slots.release()
+            raise
+        if data is False:
+            self._slots.release()
+            self._jobs.append((result, None))
+            return None
+
+        # ...streamed gathers (chunk_size) keep no dense weights
+        nbytes = getattr(cSkinClusterIO.weights_Array, "nbytes", 0)
+        self._add_pending(nbytes)
+        future = self._executor.submit(npyWriteSkinData, cSkinClusterIO, data, file_path,
+                                       versioning=versioning, incremental=incremental,
+                                       log=result.messages.append)
+        future.add_done_callback(lambda _: self._done(nbytes))
+        self._jobs.append((result, future))
+        return future
+
+    def _add_pending(self, nbytes):
+        with self._pendingBytesChanged:
+            self._pendingBytes += nbytes
+
+    def _done(self, nbytes):
+        self._add_pending(-nbytes)
+        with self._pendingBytesChanged:
+            self._pendingBytesChanged.notify_all()
+        self._slots.release()
+
+    def results(self):
+        """ wait for every queued write
+
+        Returns:
+            list: ExportResult in submit order, worker exceptions are stored, not raised
+        """
+        results = []
+        for result, future in self._jobs:
+            if future is not None:
+                try:
+                    result.written = future.result()
+                except Exception as e:
+                    result.error = e
+            results.append(result)
+        self._jobs = []
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def _read(file_path):
+    cSkinClusterIO = SkinClusterIO()
+    cSkinClusterIO.read(file_path)
+    return cSkinClusterIO
+
+
+def read_ahead(file_paths, prefetch=PREFETCH, max_workers=MAX_WORKERS):
+    """ read (and expand) skin files in a thread pool, at most prefetch files ahead of the consumer
+
+    Args:
+        file_paths(iterable): skin files
+
+    Yields:
+        tuple: (file_path, future of a read SkinClusterIO), in the order of file_paths
+    """
+    file_paths = iter(file_paths)
+    with ThreadPoolExecutor(max_workers=min(max_workers, max(prefetch, 1))) as executor:
+        pending = deque()
+        for file_path in file_paths:
+            pending.append((file_path, executor.submit(_read, file_path)))
+            if len(pending) >= prefetch:
+                break
+        while pending:
+            file_path, future = pending.popleft()
+            # ...keep the pool busy while the consumer works on the scene
+            for next_path in file_paths:
+                pending.append((next_path, executor.submit(_read, next_path)))
+                break
+            yield file_path, future
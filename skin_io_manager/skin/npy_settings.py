@@ -0,0 +1,88 @@
+""" skinCluster settings read through the API plugs in one pass per node, written undoably
+
+    settings = SkinClusterSettings.read(fnSkinCluster)
+    settings.skinningMethod = 0
+    settings.write(fnSkinCluster)
+
+A write compares with the plugs first, only the attributes that differ (and the name) are set, by
+one mel batch of setAttr/rename run inside one undo chunk. It is one call into maya and one undo
+step, MDGModifier.doIt would not be on the undo queue outside of a plugin command.
+
+More attributes are added by a subclass, e.g. the influence limits:
+
+    class InfluenceLimitSettings(SkinClusterSettings):
+        ATTRIBUTES = SkinClusterSettings.ATTRIBUTES + (("maxInfluences", "int"),
+                                                       ("maintainMaxInfluences", "bool"))
+        __slots__ = ("maxInfluences", "maintainMaxInfluences")
+"""
+from maya import cmds, mel
+
+# ...MPlug getter, python type and mel literal of every attribute kind
+_KINDS = {"float": ("asFloat", float, repr),
+          "int": ("asInt", int, str),
+          "bool": ("asBool", bool, lambda value: str(int(value)))}
+
+
+class SkinClusterSettings(object):
+    """ the skinCluster attributes saved next to the weights, values keep the cmds.getAttr types """
+
+    ATTRIBUTES = (("envelope", "float"),
+                  ("skinningMethod", "int"),
+                  ("useComponents", "bool"),
+                  ("normalizeWeights", "int"),
+                  ("deformUserNormals", "bool"))
+    __slots__ = tuple(name for name, kind in ATTRIBUTES)
+
+    def __init__(self, **values):
+        for name, kind in self.ATTRIBUTES:
+            setattr(self, name, values.get(name))
+
+    def items(self):
+        return [(name, getattr(self, name)) for name, kind in self.ATTRIBUTES]
+
+    @classmethod
+    def from_object(cls, obj):
+        """ settings from the same named attributes of obj (a SkinClusterIO), None where it has none """
+        return cls(**{name: getattr(obj, name, None) for name, kind in cls.ATTRIBUTES})
+
+    def to_object(self, obj):
+        for name, value in self.items():
+            setattr(obj, name, value)
+
+    @classmethod
+    def read(cls, fnNode):
+        """
+        Args:
+            fnNode(om2.MFnDependencyNode): the skinCluster, a MFnSkinCluster is one
+        """
+        settings = cls()
+        for name, kind in cls.ATTRIBUTES:
+            setattr(settings, name, getattr(fnNode.findPlug(name, False), _KINDS[kind][0])())
+        return settings
+
+    def write(self, fnNode, names=None, rename=None):
+        """ set the attributes (all, or names) that differ from the node, None values are left alone
+
+        Args:
+            rename(str): also rename the node, when it is not named so already
+        """
+        current = self.read(fnNode)
+        node = fnNode.name()
+        commands = []
+        for name, kind in self.ATTRIBUTES:
+            value = getattr(self, name)
+            if value is None or (names is not None and name not in names):
+                continue
+            # ...values read from older files can be numpy scalars
+            value = _KINDS[kind][1](value)
+            if value != getattr(current, name):
+                commands.append('setAttr "%s.%s" %s;' % (node, name, _KINDS[kind][2](value)))
+        if rename and node != rename:
+            commands.append('rename "%s" "%s";' % (node, rename))
+        if not commands:
+            return
+        cmds.undoInfo(openChunk=True, chunkName="skinClusterSettings")
+        try:
+            mel.eval(" ".join(commands))
+        finally:
+            cmds.undoInfo(closeChunk=True)
@@ -1,42 +1,85 @@
-import json  # noqa
+import hashlib
+import json
 import os
-import sys
 
 import maya.OpenMaya as om
-import maya.api.OpenMaya as om2
 import maya.api.OpenMayaAnim as om2Anim
 import maya.cmds as cmds
-import maya.mel as mel
 import numpy as np
 
-from . import getSkinCluster
-from ..utils.helpers import get_skinCluster_mfn
+from . import getSkinCluster, handle_cache
+from . import npy_container
+from .npy_geometry import GEOMETRY_TYPES, SkinGeometry
+from .npy_settings import SkinClusterSettings
+from .npy_transport import WeightTransport
+from .npy_weights import compress_weights, expand_weights, encode_weights, decode_weights, \
+    sparse_blend_weights, dense_blend_weights
 
 NPY_EXT = ".npySkin"
 PACK_NPY_EXT = ".npySkinPack"
 
-npd_type = "float64"
+# ...storage modes of the weights (see npy_weights.encode_weights), recorded in the file
+default_precision = "float64"
+default_index = "int32"
+# ...section compression, see npy_container.CODECS
+default_codec = npy_container.NO_CODEC
+# ...vertices per getWeights call of the streaming gather
+CHUNK_SIZE = 65536
+# ...meshes with more vertices are streamed when no chunk_size is given
+STREAM_VTX_COUNT = 4 * CHUNK_SIZE
 
 
-class SkinClusterIO(object):
+class InfluenceTable(object):
+    """ influence names checked against the scene once, shared by the skins of an import
+
+    The skins bind their influences by name (cmds.skinCluster), so only the names found in the
+    scene are kept, the other skins of a pack binding the same joint do not look it up again.
+    """
 
     def __init__(self):
+        self._existing = set()
+
+    def exists(self, name):
+        if name not in self._existing and cmds.objExists(name):
+            self._existing.add(name)
+        return name in self._existing
+
+    def missing(self, names):
+        return [name for name in names if not self.exists(name)]
+
+
+class SkinClusterIO(object):
+
+    def __init__(self, transport=None, precision=default_precision, index=default_index, codec=default_codec):
+        """
+        Args:
+            precision(str): storage of the saved weights, float64, float32 or quantized uint16
+            index(str): storage of the saved influence ids, int32 or int16
+            codec(str): compression of the saved sections, none, zlib, lzma or bz2
+        """
 
         # ...class init
         self.cDataIO = DataIO()
+        self.transport = transport or WeightTransport()
+        self.precision = precision
+        self.index = index
+        self.codec = codec
 
         # ...vars
         self.name = ''
         self.type = 'skinCluster'
         self.weightsNonZero_Array = []
         self.weights_Array = []
+        self.infCount = 0
         self.infMap_Array = []
         self.vertSplit_Array = []
         self.inf_Array = []
         self.skinningMethod = 1
         self.normalizeWeights = 1
         self.geometry = None
+        self.skinGeometry = None
         self.blendWeights = []
+        self.blendWeightIds = []
         self.vtxCount = 0
         self.envelope = 1
         self.skinningMethod = 1
@@ -46,190 +89,204 @@ class SkinClusterIO(object):
 
         pass
 
-    def get_mesh_components_from_tag_expression(self, skinPy, tag='*'):
-        # Get the first geometry connected to the skin cluster
-        geometries = cmds.skinCluster(skinPy, query=True, geometry=True)
-        if not geometries:
-            raise RuntimeError("No geometries found connected to the skin cluster.")
-        geo = geometries[0]
-
-        # Get the geo out attribute for the shape
-        out_attr = cmds.deformableShape(geo, localShapeOutAttr=True)[0]
-
-        # Get the output geometry data as MObject
-        sel = om.MSelectionList()
-        sel.add(geo)
-        dep = om.MObject()
-        sel.getDependNode(0, dep)
-        fn_dep = om.MFnDependencyNode(dep)
-        plug = fn_dep.findPlug(out_attr, True)
-        obj = plug.asMObject()
-
-        # Use the MFnGeometryData class to query the components for a tag
-        # expression
-        fn_geodata = om.MFnGeometryData(obj)
+    def get_api2_handles(self, skinCluster):
+        """ get the om2 function set, shape dagPath and vertex components shared by get_data and set_data
 
-        # Components MObject
-        components = fn_geodata.resolveComponentTagExpression(tag)
-
-        dagPath = om.MDagPath.getAPathTo(dep)
-        return dagPath, components
+        Returns:
+            tuple: (geometry, MFnSkinCluster, MDagPath, components MObject)
+        """
+        # ...get skin/mesh, the components are complete components, no vertex list is built
+        fnSkinCluster = handle_cache.fn(skinCluster, om2Anim.MFnSkinCluster)
+        self.skinGeometry = handle_cache.fn(fnSkinCluster.getOutputGeometry()[0], SkinGeometry)
 
-    def get_data(self, skinCluster):
+        return self.skinGeometry.name, fnSkinCluster, self.skinGeometry.dagPath, self.skinGeometry.component()
 
-        # ...get PyNode skinCluster
-        # skinPy = pm.PyNode(skinCluster)
+    def get_data(self, skinCluster, compress=True, chunk_size=None):
+        """
+        Args:
+            skinCluster(str): skinCluster node
+            compress(bool): build the CSR arrays now, otherwise the dense weights are kept in
+                self.weights_Array until compress_data is called (off the main thread)
+            chunk_size(int): stream the weights chunk_size vertices at a time into temp file
+                spools (see stream_weightData), the dense weights never exist as a whole. None
+                streams CHUNK_SIZE chunks for meshes over STREAM_VTX_COUNT vertices, 0 never streams
+        """
 
-        # ...Pre Maya 2022 or new compoent tag expression
-        try:
-            # fnSet = OpenMaya.MFnSet(skinPy.__apimfn__().deformerSet())
-            fnSet = om.MFnSet(get_skinCluster_mfn(skinCluster).deformerSet())
-            members = om.MSelectionList()
-            fnSet.getMembers(members, False)
-            dagPath = om.MDagPath()
-            components = om.MObject()
-            members.getDagPath(0, dagPath, components)
-        except:
-            dagPath, components = self.get_mesh_components_from_tag_expression(skinCluster)
-
-        # ...get mesh
-        geometry = cmds.skinCluster(skinCluster, query=True, geometry=True)[0]
-
-        # ...get vtxID_Array
-        vtxID_Array = range(0, len(cmds.ls('%s.vtx[*]' % geometry, fl=1)))
-
-        # ...get skin
-        selList = om2.MSelectionList()
-        selList.add(mel.eval('findRelatedSkinCluster %s' % geometry))
-        # a = str(getSkinCluster(geometry)) or ""
-        # selList.add(str(getSkinCluster(geometry)))
-        skinPath = selList.getDependNode(0)
-
-        # ...get mesh
-        selList = om2.MSelectionList()
-        selList.add(geometry)
-        meshPath = selList.getDagPath(0)
-
-        # ...get vtxs
-        fnSkinCluster = om2Anim.MFnSkinCluster(skinPath);
-        fnVtxComp = om2.MFnSingleIndexedComponent()
-        vtxComponents = fnVtxComp.create(om2.MFn.kMeshVertComponent)
-        fnVtxComp.addElements(vtxID_Array)
-
-        # ...get weights/infs
-        dWeights, infCount = fnSkinCluster.getWeights(meshPath, vtxComponents)
-        # weights_Array = np.array(list(dWeights), dtype=npd_type)
-        weights_Array = np.array(dWeights, dtype=npd_type)
-        ''' manually normalize weights memo(in case sometimes this method maybe faster)
-        group_size = infCount
-        arr_reshaped = weights_Array.reshape((-1, group_size))
-        normalized_arr_reshaped = arr_reshaped / arr_reshaped.sum(axis=1, keepdims=True)
-        weights_Array = normalized_arr_reshaped.reshape(-1)
-        '''
+        geometry, fnSkinCluster, meshPath, vtxComponents = self.get_api2_handles(skinCluster)
+        if chunk_size is None and self.skinGeometry.count > STREAM_VTX_COUNT:
+            chunk_size = CHUNK_SIZE
 
         inf_Array = [dp.partialPathName() for dp in fnSkinCluster.influenceObjects()]
 
-        # ...convert to weightsNonZero_Array
-        weightsNonZero_Array, infMap_Array, vertSplit_Array = self.compress_weightData(weights_Array, infCount)
+        if chunk_size:
+            vtxCount = self.skinGeometry.count
+            weightsNonZero_Array, infMap_Array, vertSplit_Array, infCount, (blendWeightIds, blendWeights) = \
+                self.stream_weightData(fnSkinCluster, self.skinGeometry, chunk_size)
+            self.weights_Array = []
+        else:
+            # ...get weights/infs
+            weights_Array, infCount = self.transport.get_weights(fnSkinCluster, meshPath, vtxComponents)
+            ''' manually normalize weights memo(in case sometimes this method maybe faster)
+            normalized_arr_reshaped = weights_Array / weights_Array.sum(axis=1, keepdims=True)
+            '''
+            vtxCount = len(weights_Array)
+
+            # ...convert to weightsNonZero_Array
+            if compress:
+                weightsNonZero_Array, infMap_Array, vertSplit_Array = self.compress_weightData(weights_Array,
+                                                                                               infCount)
+                self.weights_Array = []
+            else:
+                weightsNonZero_Array, infMap_Array, vertSplit_Array = None, None, None
+                self.weights_Array = weights_Array
 
-        # ...gatherBlendWeights
-        blendWeights_mArray = om.MDoubleArray()
-        get_skinCluster_mfn(skinCluster).getBlendWeights(dagPath, components, blendWeights_mArray)
-        blendWeights = [
-            round(blendWeights_mArray[i], 6) for i in range(blendWeights_mArray.length())
-            if round(blendWeights_mArray[i], 6) != 0.0
-        ]
+            # ...gatherBlendWeights
+            blendWeights_Array = self.transport.get_blend_weights(fnSkinCluster, meshPath, vtxComponents)
+            blendWeightIds, blendWeights = sparse_blend_weights(blendWeights_Array)
+        self.infCount = infCount
 
         # ...set data to self vars
         self.name = skinCluster
-        self.weightsNonZero_Array = np.array(weightsNonZero_Array)
-        self.infMap_Array = np.array(infMap_Array)
-        self.vertSplit_Array = np.array(vertSplit_Array)
+        self.weightsNonZero_Array = weightsNonZero_Array
+        self.infMap_Array = infMap_Array
+        self.vertSplit_Array = vertSplit_Array
         self.inf_Array = np.array(inf_Array)
         self.geometry = geometry
-        self.blendWeights = np.array(blendWeights)
-        self.vtxCount = len(vertSplit_Array) - 1
+        self.blendWeights = blendWeights
+        self.blendWeightIds = blendWeightIds
+        self.vtxCount = vtxCount
 
         # ...get attrs
-        self.envelope = cmds.getAttr(skinCluster + ".envelope")
-        self.skinningMethod = cmds.getAttr(skinCluster + ".skinningMethod")
-        self.useComponents = cmds.getAttr(skinCluster + ".useComponents")
-        self.normalizeWeights = cmds.getAttr(skinCluster + ".normalizeWeights")
-        self.deformUserNormals = cmds.getAttr(skinCluster + ".deformUserNormals")
+        SkinClusterSettings.read(fnSkinCluster).to_object(self)
 
         return True
 
-    def set_data(self, skinCluster):
+    def stream_weightData(self, fnSkinCluster, skinGeometry, chunk_size=CHUNK_SIZE):
+        """ read and compress the weights chunk_size vertices at a time
 
-        # ...get PyNode skinCluster
-        # skinPy = pm.PyNode(skinCluster)
+        Every chunk is converted to CSR right away and appended to temp file spools
+        (npy_container.SectionSpool), peak memory is one dense chunk of chunk_size * infCount.
 
-        # ...Pre Maya 2022 or new compoent tag expression
+        Returns:
+            tuple: (weightsNonZero_Array, infMap_Array, vertSplit_Array spools, infCount,
+                    (blendWeightIds, blendWeights))
+        """
+        infCount = len(fnSkinCluster.influenceObjects())
+        vtxCount = skinGeometry.count
+        # ...the index dtype is fixed up front, an int16 fallback must not differ between chunks
+        index = self.index if infCount <= np.iinfo("int16").max + 1 else "int32"
+
+        weightsNonZero_Array = vertSplit_Array = infMap_Array = None
+        blendWeightIds, blendWeights = [], []
+        nonZeroCount = 0
         try:
-            fnSet = om.MFnSet(get_skinCluster_mfn(skinCluster).deformerSet())
-            members = om.MSelectionList()
-            fnSet.getMembers(members, False)
-            dagPath = om.MDagPath()
-            components = om.MObject()
-            members.getDagPath(0, dagPath, components)
-        except:
-            dagPath, components = self.get_mesh_components_from_tag_expression(skinCluster)
-
-        ###################################################
+            for start in range(0, vtxCount, chunk_size):
+                chunkComponents = skinGeometry.component_range(start, start + chunk_size)
+
+                weights_Array, infCount = self.transport.get_weights(fnSkinCluster, skinGeometry.dagPath,
+                                                                     chunkComponents)
+                weights, infMap, vertSplit = encode_weights(*compress_weights(weights_Array, infCount),
+                                                            precision=self.precision, index=index)
+                del weights_Array
+                if weightsNonZero_Array is None:
+                    weightsNonZero_Array = npy_container.SectionSpool(weights.dtype)
+                    infMap_Array = npy_container.SectionSpool(infMap.dtype)
+                    vertSplit_Array = npy_container.SectionSpool(vertSplit.dtype)
+                    vertSplit_Array.append(vertSplit[:1])
+                weightsNonZero_Array.append(weights)
+                infMap_Array.append(infMap)
+                # ...chunk offsets start at 0, shift them behind the previous chunks
+                vertSplit_Array.append(vertSplit[1:] + nonZeroCount)
+                nonZeroCount += len(weights)
+
+                ids, values = sparse_blend_weights(
+                    self.transport.get_blend_weights(fnSkinCluster, skinGeometry.dagPath, chunkComponents))
+                blendWeightIds.append(ids + start)
+                blendWeights.append(values)
+        except Exception:
+            # ...a failed gather leaves no temp files behind
+            for spool in (weightsNonZero_Array, infMap_Array, vertSplit_Array):
+                if spool is not None:
+                    spool.close()
+            raise
+
+        if weightsNonZero_Array is None:
+            weightsNonZero_Array, infMap_Array, vertSplit_Array = encode_weights(
+                *compress_weights(np.empty(0), infCount), precision=self.precision, index=index)
+        if blendWeightIds:
+            sparseBlendWeights = np.concatenate(blendWeightIds), np.concatenate(blendWeights)
+        else:
+            sparseBlendWeights = sparse_blend_weights([])
+        return weightsNonZero_Array, infMap_Array, vertSplit_Array, infCount, sparseBlendWeights
 
-        # ...set infs
-        influencePaths = om.MDagPathArray()
-        infCount = get_skinCluster_mfn(skinCluster).influenceObjects(influencePaths)
-        influences_Array = [influencePaths[i].partialPathName() for i in range(influencePaths.length())]
+    def set_data(self, skinCluster):
 
-        # ...change the order in set(i,i)
-        influenceIndices = om.MIntArray(infCount)
-        [influenceIndices.set(i, i) for i in range(infCount)]
+        geometry, fnSkinCluster, meshPath, vtxComponents = self.get_api2_handles(skinCluster)
 
-        ###################################################
+        # ...set infs, keep the skinCluster order (i -> i)
+        infCount = len(fnSkinCluster.influenceObjects())
 
-        # ...construct mArrays from normal/numpy arrays
-        infCount = len(influences_Array)
-        weightCounter = 0
-        weights_Array = []
-        weights_mArray = om.MDoubleArray()
-        length = len(self.vertSplit_Array)
-        for vtxId, splitStart in enumerate(self.vertSplit_Array):
-            if vtxId < length - 1:
-                vertChunk_Array = [0] * infCount
-                splitEnd = self.vertSplit_Array[vtxId + 1]
-
-                # ...unpack data and replace zeros with nonzero weight vals
-                for i in range(splitStart, splitEnd):
-                    infMap = self.infMap_Array[i]
-                    val = self.weightsNonZero_Array[i]
-                    vertChunk_Array[infMap] = val
-
-                # ...append to raw data array
-                for vert in vertChunk_Array:
-                    weights_mArray.append(vert)
+        # ...construct the dense (vtx, inf) buffer from the CSR arrays in one go, unless read did already
+        weights_Array = self.weights_Array
+        if not len(weights_Array) or np.shape(weights_Array)[1] != infCount:
+            weights_Array = expand_weights(self.weightsNonZero_Array, self.infMap_Array, self.vertSplit_Array,
+                                           infCount)
+        self.weights_Array = []
 
         ###################################################
         # ...set data
-        get_skinCluster_mfn(skinCluster).setWeights(dagPath, components, influenceIndices, weights_mArray,
-                                                    True)  # True for normalize
-        if self.blendWeights is not None:
-            blendWeights_mArray = om.MDoubleArray()
-            for i in self.blendWeights:
-                blendWeights_mArray.append(i)
-            get_skinCluster_mfn(skinCluster).setBlendWeights(dagPath, components, blendWeights_mArray)
+        self.transport.set_weights(fnSkinCluster, meshPath, vtxComponents, weights_Array,
+                                   np.arange(infCount), True)  # True for normalize
+        blendWeights = self.dense_blendWeights()
+        if blendWeights is not None:
+            self.transport.set_blend_weights(fnSkinCluster, meshPath, vtxComponents, blendWeights)
         ###################################################
-        # ...set attrs of skinCluster
-        cmds.setAttr('%s.envelope' % skinCluster, self.envelope)
-        cmds.setAttr('%s.skinningMethod' % skinCluster, self.skinningMethod)
-        cmds.setAttr('%s.useComponents' % skinCluster, self.useComponents)
-        cmds.setAttr('%s.normalizeWeights' % skinCluster, self.normalizeWeights)
-        cmds.setAttr('%s.deformUserNormals' % skinCluster, self.deformUserNormals)
+        # ...set attrs of skinCluster and its name, in one pass over the plugs
+        SkinClusterSettings.from_object(self).write(fnSkinCluster, rename=self.geometry + "_skinCls")
 
-        # ...name
-        cmds.rename(skinCluster, self.geometry + "_skinCls")
+    def dense_blendWeights(self):
+        """ one blend weight per vertex for setBlendWeights, None when there is nothing to set
 
-    def save(self, node=None, file_path=None):
+        Files written before blendWeightIds only kept the non zero values, without their vertex,
+        unless every vertex had one they can not be put back on the right vertices.
+        """
+        if self.blendWeights is None or not len(self.blendWeights):
+            return None
+        if self.blendWeightIds is not None and len(self.blendWeightIds) == len(self.blendWeights):
+            return dense_blend_weights(self.blendWeightIds, self.blendWeights, self.vtxCount)
+        if len(self.blendWeights) == self.vtxCount:
+            return np.asarray(self.blendWeights)
+        om.MGlobal.displayWarning('SKIPPED: blend weights of %s have no vertex ids, re-export the skin'
+                                  % self.geometry)
+        return None
+
+    def save(self, node=None, file_path=None, precision=None, index=None, codec=None, chunk_size=None):
+
+        # ...get dirpath
+        if file_path is None:
+            startDir = cmds.workspace(q=True, rootDirectory=True)
+            file_path = cmds.fileDialog2(caption='Save Skinweights', dialogStyle=2, fileMode=3,
+                                         startingDirectory=startDir, fileFilter='*.npySkin', okCaption="Select")
+
+        self.precision = precision or self.precision
+        self.index = index or self.index
+        self.codec = codec or self.codec
+        data = self.gather(node, chunk_size=chunk_size)
+        if data is False:
+            return False
+        try:
+            self.write(file_path, data)
+        finally:
+            self.cDataIO.close(data)
+
+    def gather(self, node=None, compress=True, chunk_size=None):
+        """ read the skinCluster of a node into the [legend, item, ...] layout DataIO writes
+
+        With compress=False only the maya side runs, the CSR items of data are None until
+        compress_data fills them, which does not touch maya and can run on a worker thread.
+        Streamed gathers (see get_data for chunk_size) hold the CSR items as spools (compress is
+        ignored), for meshes whose dense weights would not fit in memory. DataIO.close deletes them.
+        """
 
         # ...get selection
         if node is None:
@@ -248,18 +305,12 @@ class SkinClusterIO(object):
             print('ERROR: Node has no skinCluster!')
             return False
 
-        # ...get dirpath
-        if file_path is None:
-            startDir = cmds.workspace(q=True, rootDirectory=True)
-            file_path = cmds.fileDialog2(caption='Save Skinweights', dialogStyle=2, fileMode=3,
-                                         startingDirectory=startDir, fileFilter='*.npySkin', okCaption="Select")
-
         # ...get filepath
         # skinCluster = 'skinCluster_%s' % node
         # filepath = '%s/%s.npySkin' % (file_path, node)
 
         # ...get data
-        self.get_data(skinCluster)
+        self.get_data(skinCluster, compress=compress, chunk_size=chunk_size)
         transformNode, meshNode = self._geometry_compatibility()
         self.geometry = transformNode
         if self.skinningMethod < 0:
@@ -273,6 +324,7 @@ class SkinClusterIO(object):
                   'inf_Array',
                   'geometry',
                   'blendWeights',
+                  'blendWeightIds',
                   'vtxCount',
 
                   'name',
@@ -284,6 +336,7 @@ class SkinClusterIO(object):
                   'deformUserNormals',
 
                   'type',
+                  'weightPrecision',
                   )
 
         data = [legend,
@@ -294,6 +347,7 @@ class SkinClusterIO(object):
                 self.inf_Array,
                 self.geometry,
                 self.blendWeights,
+                self.blendWeightIds,
                 self.vtxCount,
 
                 self.name,
@@ -305,18 +359,32 @@ class SkinClusterIO(object):
                 self.deformUserNormals,
 
                 self.type,
+                self.precision,
                 ]
         # for i in data:
         #     print(type(i))
+        return data
 
-        # ...write data (temporarily add pickle method for python3.9)
-        if sys.version_info[0] == 3 and sys.version_info[1] == 9:
-            import pickle
-            with open(file_path, 'wb') as fh:
-                pickle.dump(data, fh)
-        else:
-            with open(file_path, 'wb') as fh:
-                np.save(fh, data, allow_pickle=True)
+    def compress_data(self, data):
+        """ fill the CSR items of data gathered with compress=False """
+        if not len(self.weights_Array):
+            return data
+        weightsNonZero_Array, infMap_Array, vertSplit_Array = self.compress_weightData(self.weights_Array,
+                                                                                       self.infCount)
+        self.weights_Array = []
+        self.weightsNonZero_Array = weightsNonZero_Array
+        self.infMap_Array = infMap_Array
+        self.vertSplit_Array = vertSplit_Array
+        legend = data[0]
+        data[legend.index("weightsNonZero_Array")] = weightsNonZero_Array
+        data[legend.index("infMap_Array")] = infMap_Array
+        data[legend.index("vertSplit_Array")] = vertSplit_Array
+        return data
+
+    def write(self, file_path, data, contentHash=None):
+
+        # ...write data
+        self.cDataIO.write(file_path, data, contentHash=contentHash, codec=self.codec)
 
         # region --- debug codes region ---
         # _data = [legend,
@@ -362,8 +430,19 @@ class SkinClusterIO(object):
             print('ERROR: file {} does not exist!'.format(file_path))
             return False
 
-        # ...read data
-        data = np.load(file_path, allow_pickle=True)
+        self.read(file_path)
+        return self.apply(createMissingJoints=createMissingJoints)
+
+    def read(self, file_path, expand=True):
+        """ the file side of load, it does not touch maya and can run on a worker thread
+
+        Args:
+            file_path(str): .npySkin file
+            expand(bool): also build the dense (vtx, inf) weights set_data needs
+        """
+
+        # ...read data (legacy pickled list or typed container)
+        data = self.cDataIO.read(file_path)
 
         # ...get item data from numpy array
         self.legend_Array = self.cDataIO.get_legendArrayFromData(data)
@@ -372,6 +451,8 @@ class SkinClusterIO(object):
         self.vertSplit_Array = self.cDataIO.get_dataItem(data, 'vertSplit_Array', self.legend_Array)
         self.inf_Array = self.cDataIO.get_dataItem(data, 'inf_Array', self.legend_Array)
         self.blendWeights = self.cDataIO.get_dataItem(data, 'blendWeights', self.legend_Array)
+        self.blendWeightIds = self.cDataIO.get_dataItem(data, 'blendWeightIds', self.legend_Array) \
+            if 'blendWeightIds' in self.legend_Array else None
         self.vtxCount = self.cDataIO.get_dataItem(data, 'vtxCount', self.legend_Array)
         self.geometry = self.cDataIO.get_dataItem(data, 'geometry', self.legend_Array)
         self.name = self.cDataIO.get_dataItem(data, 'name', self.legend_Array)
@@ -381,23 +462,38 @@ class SkinClusterIO(object):
         self.normalizeWeights = self.cDataIO.get_dataItem(data, 'normalizeWeights', self.legend_Array)
         self.deformUserNormals = self.cDataIO.get_dataItem(data, 'deformUserNormals', self.legend_Array)
 
+        # ...the skinCluster is bound with inf_Array in order, so it has len(inf_Array) influences
+        if expand:
+            self.weights_Array = expand_weights(self.weightsNonZero_Array, self.infMap_Array, self.vertSplit_Array,
+                                                len(self.inf_Array))
+        return True
+
+    def apply(self, createMissingJoints=True, influenceTable=None):
+        """ the scene side of load: rebind the geometry of the read data and set its weights
+
+        Args:
+            influenceTable(InfluenceTable): share the influence lookups between the skins of an import
+        """
+
         node = self.geometry
         transformNode, meshNode = self._geometry_compatibility()
+        skinGeometry = handle_cache.fn(meshNode, SkinGeometry)
         dataVertexCount = self.vtxCount
-        nodeVertexCount = cmds.polyEvaluate(node, vertex=True)
+        nodeVertexCount = skinGeometry.count
         if dataVertexCount != nodeVertexCount:
             return om.MGlobal.displayWarning(
                 'SKIPPED: vertex count mismatch! %s != %s' % (dataVertexCount, nodeVertexCount))
         # ...unbind current skinCluster
-        skinCluster = mel.eval('findRelatedSkinCluster ' + node)
+        skinCluster = skinGeometry.skinCluster_name()
         # skinCluster = str(getSkinCluster(node)) or ""
         # print(skinCluster, node, "-------------")
-        if cmds.objExists(skinCluster):
+        if skinCluster:
             # mel.eval('skinCluster -e  -ub ' + skinCluster)
             cmds.skinCluster(skinCluster, e=True, ub=True)
 
         # ...bind skin
-        missing_joints = [inf for inf in self.inf_Array if not cmds.objExists(inf)]
+        influenceTable = influenceTable or InfluenceTable()
+        missing_joints = influenceTable.missing(self.inf_Array)
         if missing_joints:
             if createMissingJoints:
                 if not cmds.objExists('missingJoints'):
@@ -421,31 +517,9 @@ class SkinClusterIO(object):
 
     def compress_weightData(self, weights_Array, infCount):
 
-        # ...convert to weightsNonZero_Array
-        weightsNonZero_Array = []
-        infCounter = 0
-        infMap_Chunk = []
-        infMap_ChunkCount = 0
-        vertSplit_Array = [infMap_ChunkCount]
-        infMap_Array = []
-
-        for w in weights_Array:
-            if w != 0.0:
-                weightsNonZero_Array.append(w)
-                infMap_Chunk.append(infCounter)
-
-            # ...update inf counter
-            infCounter += 1
-            if infCounter == infCount:
-                infCounter = 0
-
-                # ...update vertSplit_Array
-                infMap_Array.extend(infMap_Chunk)
-                infMap_ChunkCount = len(infMap_Chunk) + infMap_ChunkCount
-                vertSplit_Array.append(infMap_ChunkCount)
-                infMap_Chunk = []
-
-        return weightsNonZero_Array, infMap_Array, vertSplit_Array
+        # ...convert to weightsNonZero_Array (vectorized, see npy_weights) in the storage mode
+        weightsNonZero_Array, infMap_Array, vertSplit_Array = compress_weights(weights_Array, infCount)
+        return encode_weights(weightsNonZero_Array, infMap_Array, vertSplit_Array, self.precision, self.index)
 
     # def _geometry_compatibility(self):
     #     """ save&load skin data with shape node is not compatible enough,
@@ -468,8 +542,8 @@ class SkinClusterIO(object):
         transformNode = None
         meshNode = None
 
-        # Check if geometry is a mesh node
-        if cmds.nodeType(meshData) == "mesh":
+        # Check if geometry is a mesh (or nurbs) node
+        if cmds.nodeType(meshData) in GEOMETRY_TYPES:
             transformNode = cmds.listRelatives(meshData, parent=True, fullPath=True)[0]
             meshNode = meshData
         # Check if geometry is a transform node
@@ -477,7 +551,7 @@ class SkinClusterIO(object):
             transformNode = meshData
             shapes = cmds.listRelatives(meshData, shapes=True, fullPath=True) or []
             for shape in shapes:
-                if cmds.nodeType(shape) == "mesh":
+                if cmds.nodeType(shape) in GEOMETRY_TYPES:
                     meshNode = shape
                     break
 
@@ -493,6 +567,146 @@ class DataIO(object):
 
         pass
 
+    @staticmethod
+    def get_formatVersion(file_path):
+        if npy_container.is_container(file_path):
+            return npy_container.read_header(file_path)["formatVersion"]
+        return npy_container.LEGACY_FORMAT_VERSION
+
+    @staticmethod
+    def read_metadata(file_path, legacy_full_read=False):
+        """ read the library relevant fields of a skin file from its header only
+
+        Legacy (format version 1) files have no header, their fields are None unless
+        legacy_full_read is set, which unpickles the whole file.
+
+        Returns:
+            dict: vtxCount, infCount, geometry, skinningMethod, formatVersion
+        """
+        if npy_container.is_container(file_path):
+            return DataIO.metadata_from_header(npy_container.read_header(file_path))
+        result = dict(vtxCount=None, infCount=None, geometry=None, skinningMethod=None,
+                      formatVersion=npy_container.LEGACY_FORMAT_VERSION)
+        if not legacy_full_read:
+            return result
+        data = DataIO.read(file_path)
+        meta = {item: DataIO.get_dataItem(data, item) for item in data[0][1:]}
+        return DataIO._metadata(meta, result)
+
+    @staticmethod
+    def metadata_from_header(header):
+        """ read_metadata fields of a container header """
+        result = dict(formatVersion=header["formatVersion"])
+        result = DataIO._metadata(header["meta"], result)
+        # ...np.array([]) of no influences is float, it is stored as a section
+        section = header["sections"].get("inf_Array")
+        if result["infCount"] is None and section is not None:
+            result["infCount"] = section["shape"][0]
+        return result
+
+    @staticmethod
+    def _metadata(meta, result):
+        inf_Array = meta.get("inf_Array")
+        result.update(vtxCount=meta.get("vtxCount"),
+                      infCount=None if inf_Array is None else len(inf_Array),
+                      geometry=meta.get("geometry"),
+                      skinningMethod=meta.get("skinningMethod"))
+        return result
+
+    @staticmethod
+    def read(file_path, mmap=True):
+        """ read a skin file into the [legend, item, ...] layout, whatever its format version
+
+        Args:
+            file_path(str): .npySkin file
+            mmap(bool): memory-map the typed sections of the container format
+
+        Returns:
+            list: legend followed by the data items
+        """
+        if not npy_container.is_container(file_path):
+            return np.load(file_path, allow_pickle=True)
+        header = npy_container.read_header(file_path)
+        sections = npy_container.read_sections(file_path, header, mmap=mmap)
+        meta = header["meta"]
+        legend = tuple(meta["legend"])
+        data = [legend]
+        for item in legend[1:]:
+            if item in sections:
+                data.append(sections[item])
+            elif item in header["arrays"]:
+                data.append(np.array(meta[item]))
+            else:
+                data.append(meta.get(item))
+        # ...quantized weights are handed out as float, like the other storage modes
+        if "weightPrecision" in legend:
+            index = legend.index("weightsNonZero_Array")
+            data[index] = decode_weights(data[index], meta.get("weightPrecision"))
+        return data
+
+    @staticmethod
+    def content_hash(data):
+        """ sha1 of the weights, influences and attributes of [legend, item, ...] data
+
+        Stored in the container header on write, an export can compare it with the file on disk
+        without reading (or writing) the weights.
+        """
+        sha = hashlib.sha1()
+        for item, value in zip(data[0][1:], data[1:]):
+            sha.update(item.encode("utf-8"))
+            if isinstance(value, npy_container.SectionSpool):
+                sha.update("{}{}".format(value.dtype.str, value.shape).encode("utf-8"))
+                for block in value.blocks():
+                    sha.update(block)
+            elif isinstance(value, np.ndarray) and value.dtype.kind in "biuf":
+                value = np.ascontiguousarray(value)
+                sha.update("{}{}".format(value.dtype.str, value.shape).encode("utf-8"))
+                sha.update(value)
+            else:
+                if isinstance(value, (np.ndarray, np.generic)):
+                    value = value.tolist()
+                sha.update(json.dumps(value, sort_keys=True, default=str).encode("utf-8"))
+        return sha.hexdigest()
+
+    @staticmethod
+    def read_contentHash(file_path):
+        """ content hash recorded in the header, None for legacy files and files written before it """
+        if not os.path.exists(file_path) or not npy_container.is_container(file_path):
+            return None
+        return npy_container.read_header(file_path)["meta"].get("contentHash")
+
+    @staticmethod
+    def to_container(data, contentHash=None):
+        """ split [legend, item, ...] data into container (meta, sections, arrays), numeric arrays
+        become binary sections, contentHash is computed from data if not given
+        """
+        legend = data[0]
+        meta = dict(legend=list(legend), contentHash=contentHash or DataIO.content_hash(data))
+        sections = {}
+        arrays = []
+        for item, value in zip(legend[1:], data[1:]):
+            if isinstance(value, npy_container.SectionSpool) or \
+                    isinstance(value, np.ndarray) and value.dtype.kind in "biuf":
+                sections[item] = value
+            else:
+                if isinstance(value, np.ndarray):
+                    arrays.append(item)
+                meta[item] = value
+        return meta, sections, arrays
+
+    @staticmethod
+    def write(file_path, data, contentHash=None, codec=None):
+        """ write [legend, item, ...] data as a typed container, codec compresses its sections """
+        meta, sections, arrays = DataIO.to_container(data, contentHash)
+        npy_container.write_container(file_path, meta, sections, arrays, codec=codec)
+
+    @staticmethod
+    def close(data):
+        """ delete the temp files of the spooled items of a streamed gather, once data is written """
+        for value in data[1:]:
+            if isinstance(value, npy_container.SectionSpool):
+                value.close()
+
     @staticmethod
     def get_legendArrayFromData(data):
 
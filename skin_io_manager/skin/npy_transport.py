@@ -0,0 +1,84 @@
+import numpy as np
+
+from .npy_weights import weight_dtype
+
+
+class WeightTransport(object):
+    """ moves numpy weight buffers in and out of a skinCluster through API 2.0
+
+    The maya modules are injected so a fake module can stand in for them outside of maya,
+    it only has to provide MDoubleArray/MIntArray and the MFnSkinCluster methods used here.
+
+    mArrays exposing their memory (the buffer protocol) are sized up front and filled, or read,
+    with one numpy copy. Others are built from, and read as, a sequence of python numbers.
+    """
+
+    def __init__(self, om2=None):
+        if om2 is None:
+            import maya.api.OpenMaya as om2
+        self.om2 = om2
+        # ...mArray type -> whether it exposes a writable buffer, detected on first use
+        self._buffers = {}
+
+    # --- conversions ---
+
+    def has_buffer(self, mArrayType):
+        """ True if mArrayType(length, value) exposes its elements as a writable buffer """
+        if mArrayType not in self._buffers:
+            try:
+                self._buffers[mArrayType] = not memoryview(mArrayType(1, 0)).readonly
+            except (TypeError, ValueError, NotImplementedError):
+                self._buffers[mArrayType] = False
+        return self._buffers[mArrayType]
+
+    def _to_mArray(self, mArrayType, array):
+        if self.has_buffer(mArrayType):
+            mArray = mArrayType(len(array), 0)
+            np.asarray(memoryview(mArray))[:] = array
+            return mArray
+        # ...fallback, one python number per element
+        return mArrayType(array.tolist())
+
+    def to_mDoubleArray(self, array):
+        return self._to_mArray(self.om2.MDoubleArray, np.ascontiguousarray(array, dtype=weight_dtype).ravel())
+
+    def to_mIntArray(self, array):
+        return self._to_mArray(self.om2.MIntArray, np.ascontiguousarray(array, dtype="int32").ravel())
+
+    @staticmethod
+    def from_mArray(mArray, dtype=weight_dtype):
+        try:
+            view = memoryview(mArray)
+        except TypeError:
+            # ...fallback, the mArray is read as a sequence
+            return np.array(mArray, dtype=dtype)
+        return np.array(view, dtype=dtype)
+
+    # --- weights ---
+
+    def get_weights(self, fnSkinCluster, shape, components):
+        """
+        Returns:
+            tuple: ((vtx, inf) weights array, infCount)
+        """
+        dWeights, infCount = fnSkinCluster.getWeights(shape, components)
+        weights = self.from_mArray(dWeights)
+        return weights.reshape(-1, infCount) if infCount else weights.reshape(0, 0), infCount
+
+    def set_weights(self, fnSkinCluster, shape, components, weights, influenceIndices=None, normalize=True):
+        weights = np.asarray(weights)
+        if influenceIndices is None:
+            infCount = weights.shape[1] if weights.ndim == 2 else len(fnSkinCluster.influenceObjects())
+            influenceIndices = np.arange(infCount)
+        fnSkinCluster.setWeights(shape, components,
+                                 self.to_mIntArray(influenceIndices),
+                                 self.to_mDoubleArray(weights),
+                                 normalize)
+
+    # --- blend weights ---
+
+    def get_blend_weights(self, fnSkinCluster, shape, components):
+        return self.from_mArray(fnSkinCluster.getBlendWeights(shape, components))
+
+    def set_blend_weights(self, fnSkinCluster, shape, components, blendWeights):
+        fnSkinCluster.setBlendWeights(shape, components, self.to_mDoubleArray(blendWeights))
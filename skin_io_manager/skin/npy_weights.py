@@ -0,0 +1,150 @@
+import numpy as np
+
+weight_dtype = "float64"
+index_dtype = "int32"
+# ...what np.array() made of the legacy index lists (int64 on Linux, macOS and numpy 2), the
+#    compressor keeps it so its output is byte-identical, index storage is encode_weights' job
+csr_index_dtype = np.array([0]).dtype.name
+
+
+def compress_weights(weights_Array, infCount):
+    """ convert a flat (vtx * inf) weights array into CSR style arrays
+
+    Args:
+        weights_Array: flat weights as returned by MFnSkinCluster.getWeights
+        infCount(int): number of influences per vertex
+
+    Returns:
+        tuple: (weightsNonZero_Array, infMap_Array, vertSplit_Array), the index arrays are
+            csr_index_dtype
+    """
+    weights = np.asarray(weights_Array, dtype=weight_dtype).ravel()
+    vtxCount = weights.size // infCount if infCount else 0
+
+    # ...a trailing partial vertex chunk is dropped, same as the old loop did
+    weights = weights[:vtxCount * infCount].reshape(vtxCount, infCount)
+    mask = weights != 0.0
+
+    weightsNonZero_Array = weights[mask]
+    infMap_Array = np.nonzero(mask)[1].astype(csr_index_dtype)
+    vertSplit_Array = np.zeros(vtxCount + 1, dtype=csr_index_dtype)
+    np.cumsum(np.count_nonzero(mask, axis=1), out=vertSplit_Array[1:])
+
+    return weightsNonZero_Array, infMap_Array, vertSplit_Array
+
+
+def expand_weights(weightsNonZero_Array, infMap_Array, vertSplit_Array, infCount):
+    """ scatter CSR style arrays back into a dense (vtx, inf) weights buffer
+
+    Args:
+        weightsNonZero_Array: non zero weight values
+        infMap_Array: influence index of every value
+        vertSplit_Array: start offset of every vertex chunk, plus the end offset
+        infCount(int): number of influences on the target skinCluster
+
+    Returns:
+        np.ndarray: (vtx, inf) weights, zero where nothing was stored
+    """
+    vertSplit_Array = np.asarray(vertSplit_Array, dtype="int64")
+    vtxCount = max(len(vertSplit_Array) - 1, 0)
+    weights = np.zeros((vtxCount, infCount), dtype=weight_dtype)
+    if not vtxCount:
+        return weights
+
+    start, end = vertSplit_Array[0], vertSplit_Array[-1]
+    rows = np.repeat(np.arange(vtxCount), np.diff(vertSplit_Array))
+    weights[rows, np.asarray(infMap_Array)[start:end]] = np.asarray(weightsNonZero_Array)[start:end]
+    return weights
+
+
+# ...storage modes of the non zero weights, the in memory weights are always weight_dtype
+PRECISIONS = ("float64", "float32", "uint16")
+INDEX_DTYPES = ("int32", "int16")
+QUANTIZE_SCALE = 65535
+
+
+def quantize_weights(weightsNonZero_Array, vertSplit_Array, scale=QUANTIZE_SCALE):
+    """ quantize CSR weights to uint16 steps of 1 / scale, keeping the sum of every vertex exact
+
+    Every vertex is rounded down, then the steps it lost are given back to its values with the
+    largest remainders (largest remainder method), so a normalized vertex still sums to scale.
+    """
+    weights = np.asarray(weightsNonZero_Array, dtype=weight_dtype)
+    vertSplit_Array = np.asarray(vertSplit_Array, dtype="int64")
+    lengths = np.diff(vertSplit_Array)
+    start, end = vertSplit_Array[0], vertSplit_Array[-1]
+    scaled = np.clip(weights[start:end], 0.0, 1.0) * scale
+    floor = np.floor(scaled)
+    remainder = scaled - floor
+
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    rowStarts = vertSplit_Array[:-1] - start
+    target = np.rint(np.bincount(rows, weights=scaled, minlength=len(lengths)))
+    lost = target - np.bincount(rows, weights=floor, minlength=len(lengths))
+
+    # ...rank the values of every vertex by remainder, largest first
+    order = np.lexsort((-remainder, rows))
+    rank = np.empty(len(order), dtype="int64")
+    rank[order] = np.arange(len(order)) - np.repeat(rowStarts, lengths)
+    floor[rank < lost[rows]] += 1
+
+    quantized = np.zeros(len(weights), dtype="uint16")
+    quantized[start:end] = np.minimum(floor, scale)
+    return quantized
+
+
+def dequantize_weights(weightsNonZero_Array, scale=QUANTIZE_SCALE):
+    return np.asarray(weightsNonZero_Array, dtype=weight_dtype) / scale
+
+
+def encode_weights(weightsNonZero_Array, infMap_Array, vertSplit_Array, precision="float64", index="int32"):
+    """ convert CSR arrays to a storage mode
+
+    Args:
+        precision(str): one of PRECISIONS, uint16 is quantized with quantize_weights
+        index(str): dtype of infMap_Array, one of INDEX_DTYPES, int16 falls back to int32 when
+            the influence ids do not fit
+
+    Returns:
+        tuple: (weightsNonZero_Array, infMap_Array, vertSplit_Array)
+    """
+    if precision not in PRECISIONS:
+        raise ValueError("unknown weight precision {}, expected one of {}".format(precision, PRECISIONS))
+    if index not in INDEX_DTYPES:
+        raise ValueError("unknown index dtype {}, expected one of {}".format(index, INDEX_DTYPES))
+
+    if precision == "uint16":
+        weightsNonZero_Array = quantize_weights(weightsNonZero_Array, vertSplit_Array)
+    else:
+        weightsNonZero_Array = np.asarray(weightsNonZero_Array, dtype=precision)
+    infMap_Array = np.asarray(infMap_Array)
+    if index == "int16" and (not len(infMap_Array) or infMap_Array.max() <= np.iinfo("int16").max):
+        infMap_Array = infMap_Array.astype("int16")
+    else:
+        infMap_Array = infMap_Array.astype(index_dtype)
+    return weightsNonZero_Array, infMap_Array, vertSplit_Array
+
+
+def decode_weights(weightsNonZero_Array, precision="float64"):
+    """ non zero weights of a storage mode back as float values """
+    if precision == "uint16":
+        return dequantize_weights(weightsNonZero_Array)
+    return weightsNonZero_Array
+
+
+def sparse_blend_weights(blendWeights_Array, decimals=6):
+    """ (vertex ids, values) of the non zero blend weights, rounded to decimals
+
+    Returns:
+        tuple: (int32 ids, weight_dtype values), both empty for a classic linear skin
+    """
+    values = np.round(np.asarray(blendWeights_Array, dtype=weight_dtype).ravel(), decimals)
+    ids = np.flatnonzero(values)
+    return ids.astype(index_dtype), values[ids]
+
+
+def dense_blend_weights(blendWeightIds, blendWeights, vtxCount):
+    """ scatter sparse blend weights back to one value per vertex """
+    dense = np.zeros(vtxCount, dtype=weight_dtype)
+    dense[np.asarray(blendWeightIds, dtype="int64")] = blendWeights
+    return dense
@@ -4,14 +4,63 @@ import os
 import maya.OpenMaya as om
 import maya.cmds as cmds
 
-from ..utils.file_versioning import versionFile
-from .npy_skinIO import SkinClusterIO
+from ..utils.file_versioning import versionFile, registerDeltaCodec
+from .npy_skinIO import SkinClusterIO, DataIO
+from .npy_delta import NpySkinDeltaCodec
 from . import getSkinCluster
 
+registerDeltaCodec(".npySkin", NpySkinDeltaCodec())
+
+
+def npySaveSkin(mesh, file_path, versioning=False, incremental=False, precision="float64", index="int32",
+                codec=None, chunk_size=None):
+    """
+    Args:
+        mesh(str): skinned mesh
+        file_path(str): .npySkin file
+        versioning(bool): version the existing file before it is overwritten
+        incremental(bool): skip the write (and the version) when the content hash matches the file
+        precision(str): weight storage, float64, float32 or quantized uint16
+        index(str): influence id storage, int32 or int16
+        codec(str): section compression, none, zlib, lzma or bz2
+        chunk_size(int): gather the weights this many vertices at a time, meshes over
+            STREAM_VTX_COUNT vertices are streamed by default (see SkinClusterIO.get_data)
+
+    Returns:
+        bool: True if written, False if skipped as unchanged, None if there was nothing to save
+    """
+    cSkinClusterIO = SkinClusterIO(precision=precision, index=index, codec=codec)
+    data = cSkinClusterIO.gather(mesh, chunk_size=chunk_size)
+    if data is False:
+        return None
+    return npyWriteSkinData(cSkinClusterIO, data, file_path, versioning=versioning, incremental=incremental)
+
+
+def npyPrepareSkinData(cSkinClusterIO, data):
+    """ compress gathered data and hash it, returns (data, contentHash) """
+    data = cSkinClusterIO.compress_data(data)
+    return data, DataIO.content_hash(data)
 
-def npySaveSkin(mesh, file_path):
-    cSkinClusterIO = SkinClusterIO()
-    cSkinClusterIO.save(mesh, file_path=file_path)
+
+def npyWriteSkinData(cSkinClusterIO, data, file_path, versioning=False, incremental=False, log=None):
+    """ the part of npySaveSkin after the maya gather, it does not touch maya and is thread safe
+
+    Args:
+        log(callable): gets the versioning messages, pass one when not on the main thread
+
+    Returns:
+        bool: True if written, False if skipped as unchanged
+    """
+    try:
+        data, contentHash = npyPrepareSkinData(cSkinClusterIO, data)
+        if incremental and DataIO.read_contentHash(file_path) == contentHash:
+            return False
+        if versioning and os.path.exists(file_path):
+            versionFile(file_path, log=log)
+        cSkinClusterIO.write(file_path, data, contentHash=contentHash)
+        return True
+    finally:
+        DataIO.close(data)
 
 
 def npyLoadSkin(file_path):
@@ -19,6 +68,10 @@ def npyLoadSkin(file_path):
     cSkinClusterIO.load(file_path=file_path)
 
 
+def npyReadSkinInfo(file_path):
+    return DataIO.read_metadata(file_path)
+
+
 def exportSkin(folderPath, objs, versioning=False, file_ext='.npySkin'):
     if not os.path.exists(folderPath):
         om.MGlobal.displayWarning('skin folder does not exist, new one created!')
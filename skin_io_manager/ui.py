@@ -4,6 +4,8 @@ import json
 import os
 import re
 import sys
+import time
+from array import array
 from datetime import datetime
 from functools import partial
 
@@ -11,8 +13,10 @@ from maya import cmds
 from maya import OpenMaya as om
 from maya.app.general.mayaMixin import MayaQWidgetDockableMixin
 
-from .skin import getSkinCluster
+from .skin import getSkinCluster, skinCluster_batch, skinCluster_cache
 from .utils import file_versioning
+from .utils.library_index import library_index
+from .utils.name_search import NameSearchIndex
 
 # depends on the environment(have numpy or not), import npyLoadSkin
 try:
@@ -20,8 +24,9 @@ try:
 except ImportError:
     np = None
     npyLoadSkin = None
+    npyReadSkinInfo = None
 if np is not None:
-    from .skin.skinIO import npyLoadSkin
+    from .skin.skinIO import npyLoadSkin, npyReadSkinInfo
 
 # --- for standalone UI---
 ICON_DIR = os.path.join(os.path.dirname(__file__), "icons").replace("\\", "/")
@@ -64,23 +69,58 @@ else:
     PACK_EXTENTIONS = ()
 
 SKIN_PACK_NAME = "skin"
+SEARCH_DEBOUNCE_MS = 150
+
+SKINNING_METHODS = {0: "classic linear", 1: "dual quaternion", 2: "weight blended"}
 
 
 def get_existing_versions(path):
-    path = os.path.normpath(path)
-    basename = os.path.basename(path)
-    version_folder = os.path.join(os.path.dirname(path), "_versions", basename + ".versions")
-    # version_folder = path + ".versions"
-    if not os.path.exists(version_folder) or not os.path.isdir(version_folder):
-        return []
-    else:
-        return os.listdir(version_folder)
-    print(version_folder)
+    return library_index.versions(path)
+
+
+def get_skin_info(path):
+    """ header-only skin file metadata, empty if the format has no reader here """
+    if npyReadSkinInfo is None or not path.endswith(".npySkin"):
+        return {}
+    try:
+        return npyReadSkinInfo(path)
+    except Exception:
+        return {}
+
+
+def skin_info_tooltip(info):
+    if not info or info.get("geometry") is None:
+        return "format version: {}".format(info.get("formatVersion", "?")) if info else ""
+    return "geometry: {}\nskinning method: {}\nformat version: {}".format(
+        info["geometry"],
+        SKINNING_METHODS.get(info["skinningMethod"], info["skinningMethod"]),
+        info["formatVersion"])
 
 
 class MyFilter(QtCore.QSortFilterProxyModel):
     def __init__(self):
         super(MyFilter, self).__init__()
+        # ...source row mask from a NameSearchIndex, used instead of the regex when set
+        self._use_rows = False
+        self._accepted = None
+
+    def setFilterRows(self, rows, row_count):
+        """ filter by precomputed source rows, None accepts every row """
+        self._use_rows = True
+        self._accepted = None
+        if rows is not None:
+            self._accepted = bytearray(row_count)
+            for row in rows:
+                self._accepted[row] = 1
+        self.invalidateFilter()
+
+    def extendFilterRows(self, rows, row_count):
+        """ grow the mask for rows about to be appended to the source, no re-filter needed """
+        if not self._use_rows or self._accepted is None:
+            return
+        self._accepted.extend(bytearray(row_count - len(self._accepted)))
+        for row in rows:
+            self._accepted[row] = 1
 
     def setFilterWildcard(self, text, case_sensitive=True):
         text = re.sub(',+', ',', text)
@@ -93,9 +133,12 @@ class MyFilter(QtCore.QSortFilterProxyModel):
         regExp = "|".join(exps).replace('\\*', '.*?')
         if not case_sensitive:
             regExp = "(?i)" + regExp
+        self._use_rows = False
         self.setFilterRegularExpression(regExp)
 
     def filterAcceptsRow(self, sourceRow, sourceParent):
+        if self._use_rows:
+            return self._accepted is None or bool(self._accepted[sourceRow])
         for sourceColumn in range(1):
             filterData = self.sourceModel().index(sourceRow, sourceColumn).data(self.filterRole())
             if self.filterRegularExpression().match(filterData).hasMatch():
@@ -151,6 +194,181 @@ class MyStandardDateTimeItem(QtGui.QStandardItem):
         return self.data(QtCore.Qt.UserRole) < other.data(QtCore.Qt.UserRole)
 
 
+def library_row(entry):
+    return dict(
+        file_name=entry.name,
+        # file_path=os.path.normpath(entry.path),
+        os_time=entry.mtime,
+        file_date=datetime.fromtimestamp(entry.mtime).strftime('%m/%d/%Y %H:%M'),
+        file_versions=entry.versions,  # new
+        file_info=entry.info or {},
+    )
+
+
+class LibraryScanWorker(QtCore.QThread):
+    """ scans a skin folder off the main thread and streams the rows in batches """
+    ROWS_READY = QtCore.Signal(object, object)  # worker, rows
+
+    def __init__(self, folder_path, file_ext, batch_size=200, batch_interval=0.1, parent=None):
+        super(LibraryScanWorker, self).__init__(parent)
+        self.folder_path = folder_path
+        self.file_ext = file_ext
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def run(self):
+        batch = []
+        last_emit = time.time()
+        for entry in library_index.iter_entries(self.folder_path, self.file_ext, info_reader=get_skin_info):
+            if self.isInterruptionRequested():
+                return
+            batch.append(library_row(entry))
+            # ...flush on size or time, so the first rows show up right away
+            if len(batch) >= self.batch_size or time.time() - last_emit > self.batch_interval:
+                self.ROWS_READY.emit(self, batch)
+                batch = []
+                last_emit = time.time()
+        if batch and not self.isInterruptionRequested():
+            self.ROWS_READY.emit(self, batch)
+
+
+class SkinLibraryModel(QtCore.QAbstractTableModel):
+    """ array backed skin library model, display values are computed in data() on demand
+
+    Every column is a compact array, sorting goes through SORT_ROLE which returns the stored numbers.
+    """
+    SORT_ROLE = QtCore.Qt.UserRole + 10
+    HEADERS = ("name", "date", "version", "verts", "infs")
+
+    def __init__(self, folder_path="", file_ext="", parent=None):
+        super(SkinLibraryModel, self).__init__(parent)
+        self.folder_path = folder_path
+        self.file_ext = file_ext
+        self._file_names = []
+        self._versions = []
+        self._infos = []
+        self._mtimes = array("d")
+        self._version_counts = array("i")
+        self._selected_versions = array("i")
+        self._vtx_counts = array("q")
+        self._inf_counts = array("i")
+        # ...(row, version) -> mtime of older versions, stat'ed when first shown
+        self._version_mtimes = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._file_names)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def append_rows(self, rows):
+        if not rows:
+            return
+        first = len(self._file_names)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(rows) - 1)
+        for item in rows:
+            info = item["file_info"]
+            version_count = len(item["file_versions"]) + 1
+            self._file_names.append(item["file_name"])
+            self._versions.append(item["file_versions"])
+            self._infos.append(info)
+            self._mtimes.append(item["os_time"])
+            self._version_counts.append(version_count)
+            self._selected_versions.append(version_count)
+            self._vtx_counts.append(-1 if info.get("vtxCount") is None else info["vtxCount"])
+            self._inf_counts.append(-1 if info.get("infCount") is None else info["infCount"])
+        self.endInsertRows()
+
+    def latest_path(self, row):
+        return os.path.join(self.folder_path, self._file_names[row]).replace("\\", "/")
+
+    def file_path(self, row, version=None):
+        """ path of the selected (or given) version of a row, older versions are rebuilt through the manifest """
+        version = self._selected_versions[row] if version is None else version
+        if version >= self._version_counts[row]:
+            return self.latest_path(row)
+        return file_versioning.getVersionPath(self.latest_path(row), version)
+
+    def version_mtime(self, row):
+        version = self._selected_versions[row]
+        if version >= self._version_counts[row]:
+            return self._mtimes[row]
+        key = (row, version)
+        if key not in self._version_mtimes:
+            # ...the manifest records the time of every version, no stat per row
+            entries = library_index.version_entries(self.latest_path(row))
+            self._version_mtimes[key] = entries[version - 1].get("time", 0.0) if version <= len(entries) else 0.0
+        return self._version_mtimes[key]
+
+    def is_latest(self, row):
+        return self._selected_versions[row] == self._version_counts[row]
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+
+        if role == QtCore.Qt.DisplayRole:
+            if column == 0:
+                return self._file_names[row].split(self.file_ext)[0]
+            if column == 1:
+                return datetime.fromtimestamp(self.version_mtime(row)).strftime('%m/%d/%Y %H:%M')
+            if column == 2:
+                return str(self._selected_versions[row])
+            value = self._vtx_counts[row] if column == 3 else self._inf_counts[row]
+            return "" if value < 0 else str(value)
+        if role == self.SORT_ROLE:
+            if column == 0:
+                return self._file_names[row]
+            if column == 1:
+                return self.version_mtime(row)
+            if column == 2:
+                return self._selected_versions[row]
+            return self._vtx_counts[row] if column == 3 else self._inf_counts[row]
+        if role == QtCore.Qt.UserRole:
+            if column == 0:
+                return self._file_names[row]
+            if column == 1:
+                return str(self._mtimes[row])
+            if column == 2:
+                return self._versions[row]
+            return None
+        if role == QtCore.Qt.TextAlignmentRole:
+            if column == 0:
+                return QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft
+            return QtCore.Qt.AlignCenter
+        if role == QtCore.Qt.ToolTipRole and column == 0:
+            return skin_info_tooltip(self._infos[row])
+        # ...rows not on their latest version are highlighted
+        if role == QtCore.Qt.FontRole and not self.is_latest(row):
+            font = QtGui.QFont()
+            font.setBold(True)
+            return font
+        if role == QtCore.Qt.ForegroundRole and not self.is_latest(row):
+            return QtGui.QColor(255, 150, 100)
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        """ only the version column is settable, the value is clamped to the existing versions """
+        if not index.isValid() or index.column() != 2 or role != QtCore.Qt.EditRole:
+            return False
+        row = index.row()
+        self._selected_versions[row] = max(1, min(int(value), self._version_counts[row]))
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        return True
+
+
 class SubTable(QtWidgets.QDialog):
     VERISON_TO_SET = QtCore.Signal()
     VERSION_DELETED = QtCore.Signal()
@@ -166,7 +384,8 @@ class SubTable(QtWidgets.QDialog):
         if version_paths:
             self.setWindowTitle(version_paths[-1].split("/")[-1])
             self.latest_version_dir = os.path.dirname(version_paths[-1])
-            self.older_version_dir = os.path.dirname(version_paths[0])
+            # ...the manifests live in the versions root, the version contents in its blob store
+            self.versions_root = os.path.dirname(file_versioning.getManifestPath(version_paths[-1]))
 
         main_layout = QtWidgets.QVBoxLayout(self)
         v = 6 * DPI_SCALE
@@ -204,13 +423,20 @@ class SubTable(QtWidgets.QDialog):
         model = QtGui.QStandardItemModel()
 
         if version_paths:
+            entries = library_index.version_entries(version_paths[-1])
+
             def make_dict(index, file_):
-                if os.path.exists(os.path.normpath(file_)):
+                if index < len(entries):
+                    os_time = entries[index].get("time")
+                else:
+                    stat = library_index.stat(file_)
+                    os_time = stat[0] if stat else None
+                if os_time is not None:
                     result = dict(
                         version_name=str(index + 1).zfill(3),
                         file_path=os.path.normpath(file_),
-                        os_time=os.path.getmtime(file_),
-                        file_date=datetime.fromtimestamp(os.path.getmtime(file_)).strftime('%m/%d/%Y %H:%M'),
+                        os_time=os_time,
+                        file_date=datetime.fromtimestamp(os_time).strftime('%m/%d/%Y %H:%M'),
                     )
                     return result
                 else:
@@ -266,7 +492,11 @@ class SubTable(QtWidgets.QDialog):
         if not selection:
             return
         index = int(selection[0].data()[:3])
-        skin_file = self.version_paths[index - 1]
+        if index < len(self.version_paths):
+            # ...delta versions are rebuilt from their chain
+            skin_file = file_versioning.getVersionPath(self.version_paths[-1], index)
+        else:
+            skin_file = self.version_paths[-1]
         if skin_file:
             om.MGlobal.displayInfo("importing {}".format(skin_file))
             if skin_file.endswith(".npySkin"):
@@ -294,48 +524,10 @@ class SubTable(QtWidgets.QDialog):
         if len(selected_versions) >= len(self.version_paths):
             return om.MGlobal.displayWarning("Not allowed to delete all versions!")
 
-        # move last version to version folder
-        ori_names = [i for i in self.version_paths]
-        temp_name = file_versioning.getVersions(self.version_paths[-1])[0]
-        os.rename(self.version_paths[-1], temp_name)
-        self.version_paths[-1] = temp_name
-        # change older file to temp name
-        for i, file_ in enumerate(self.version_paths):
-            os.rename(file_, file_ + "temp")
-            self.version_paths[i] = file_ + "temp"
-
-        # archive selected versions
-        now = datetime.now()
-        current_time = now.strftime('%Y-%m-%d-%H%M%S')
-        archive_folder_name = current_time
-        archive_dir = os.path.join(self.latest_version_dir, "_archive", archive_folder_name)
-        om.MGlobal.displayInfo("archiving files to -> {}".format(archive_dir))
-        for i in selected_versions:
-            skin_file = self.version_paths[i - 1]
-            if skin_file and os.path.exists(skin_file):
-                if not os.path.exists(archive_dir):
-                    os.makedirs(archive_dir)
-                new_path = os.path.join(archive_dir,
-                                        os.path.basename(skin_file)).replace("\\", "/")
-                os.rename(skin_file, new_path[:-4])
-                del self.version_paths[i - 1]
-        # rename remained files
-        for i_, path in enumerate(self.version_paths):
-            base_name = os.path.basename(path)
-            split = base_name.split(".")
-            if i_ + 1 != len(self.version_paths):
-                split[1] = "v" + str(i_ + 1).zfill(4)
-                new_name = ".".join(split)[:-4]
-                os.rename(os.path.join(self.older_version_dir, base_name),
-                          os.path.join(self.older_version_dir, new_name))
-            else:
-                del split[1]
-                new_name = ".".join(split)[:-4]
-                os.rename(os.path.join(self.older_version_dir, base_name),
-                          os.path.join(self.latest_version_dir, new_name))
-
-        if not os.listdir(self.older_version_dir):
-            os.rmdir(self.older_version_dir)
+        archive_dir = file_versioning.archiveVersions(self.version_paths[-1], selected_versions)
+        library_index.invalidate(self.latest_version_dir)
+        library_index.invalidate(self.versions_root)
+        om.MGlobal.displayInfo("archived versions {} to -> {}".format(selected_versions, archive_dir))
         self.VERSION_DELETED.emit()
         self.accept()
 
@@ -347,9 +539,10 @@ class SkinTable(QtWidgets.QWidget):
 
         super(SkinTable, self).__init__(parent)
         self._sub_dialogs = []
+        self._scan_worker = None
         self.file_ext = None
         self.folder_path = None
-        self.source_data = {}
+        self.source_data = []
         main_layout = QtWidgets.QVBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
 
@@ -380,63 +573,54 @@ class SkinTable(QtWidgets.QWidget):
 
         main_layout.setStretch(1, 1)
 
+        # ...typing restarts the timer, the search runs once the user pauses
+        self.search_index = NameSearchIndex()
+        self._search_timer = QtCore.QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self.update_sensitive)
+
         self.update_model(folder_path, file_ext)
 
-        self.search_le.textChanged.connect(self.update_search)
+        self.search_le.textChanged.connect(self._search_timer.start)
         get_selection_btn.clicked.connect(self.get_name_form_selection)
 
-        self.proxy_model.setFilterRole(QtCore.Qt.UserRole)
-        self.proxy_model.setFilterKeyColumn(1)
         self.table_view.doubleClicked.connect(self.on_double_clicked)
         self.case_sensitive_btn.toggled.connect(self.update_sensitive)
 
     def create_model(self, folder_path, file_ext):
-        model = QtGui.QStandardItemModel()
+        return SkinLibraryModel(folder_path, file_ext)
 
-        if folder_path:
-            file_paths = [os.path.join(folder_path, i) for i in os.listdir(folder_path)]
-
-            def make_dict(file_):
-                if os.path.exists(os.path.normpath(file_)):
-                    result = dict(
-                        file_name=os.path.basename(file_),
-                        # file_path=os.path.normpath(file_),
-                        os_time=os.path.getmtime(file_),
-                        file_date=datetime.fromtimestamp(os.path.getmtime(file_)).strftime('%m/%d/%Y %H:%M'),
-                        file_versions=get_existing_versions(file_)  # new
-                    )
-                    return result
-                else:
-                    return om.MGlobal.displayError("file error")
-
-            self.source_data = [make_dict(i) for i in file_paths if i.endswith(file_ext)]
-
-            for item in self.source_data:
-                file_name = item["file_name"]
-                # file_path = item["file_path"]
-                file_name_item = QtGui.QStandardItem(file_name.split(file_ext)[0])
-                file_name_item.setTextAlignment(QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft)
-                file_name_item.setFlags(file_name_item.flags() ^ QtCore.Qt.ItemIsEditable)
-                file_name_item.setData(file_name, QtCore.Qt.UserRole)
-
-                file_date = item["file_date"]
-                os_time = str(item["os_time"])
-                file_date_item = QtGui.QStandardItem(file_date)
-                file_date_item.setTextAlignment(QtCore.Qt.AlignCenter)
-                file_date_item.setFlags(file_date_item.flags() ^ QtCore.Qt.ItemIsEditable)
-                file_date_item.setData(os_time, QtCore.Qt.UserRole + 1)
-
-                file_versions = item["file_versions"]
-                file_versions_count = str(len(file_versions) + 1)
-                file_versions_item = QtGui.QStandardItem(file_versions_count)
-                file_versions_item.setTextAlignment(QtCore.Qt.AlignCenter)
-                file_versions_item.setFlags(file_versions_item.flags() ^ QtCore.Qt.ItemIsEditable)
-                # file_versions_item.setData(file_versions_count, QtCore.Qt.UserRole + 2)
-                file_versions_item.setData(file_versions, QtCore.Qt.UserRole + 2)
-
-                if file_name.endswith(file_ext):
-                    model.appendRow([file_name_item, file_date_item, file_versions_item])
-        return model
+    def on_rows_ready(self, worker, rows):
+        # ...rows queued by a cancelled scan can still arrive, drop them
+        if worker is not self._scan_worker:
+            return
+        self.source_data.extend(rows)
+        start_row = len(self.search_index)
+        self.search_index.add([item["file_name"] for item in rows])
+        if self.search_le.text():
+            matched = self.search_index.search(self.search_le.text(), self.case_sensitive_btn.isChecked(),
+                                               start_row=start_row)
+            self.proxy_model.extendFilterRows(matched or (), len(self.search_index))
+        self.source_model.append_rows(rows)
+
+    def start_scan(self, folder_path, file_ext):
+        self.cancel_scan()
+        if not folder_path:
+            return
+        # ...parented to maya, a cancelled scan may still be running when this widget is gone
+        worker = LibraryScanWorker(folder_path, file_ext, parent=maya_main_window())
+        worker.ROWS_READY.connect(self.on_rows_ready)
+        worker.finished.connect(worker.deleteLater)
+        self._scan_worker = worker
+        worker.start()
+
+    def cancel_scan(self):
+        """ stop listening to the running scan, its thread ends on its own and deletes itself """
+        worker, self._scan_worker = self._scan_worker, None
+        if worker is not None:
+            worker.cancel()
+            worker.ROWS_READY.disconnect(self.on_rows_ready)
 
     def get_name_form_selection(self):
         sl = get_meshes(sl=True)
@@ -450,31 +634,40 @@ class SkinTable(QtWidgets.QWidget):
             folder_path = ""
         if not os.path.isdir(folder_path):
             folder_path = ""
+        self.cancel_scan()
         self.folder_path = folder_path
         self.file_ext = file_ext
+        self.source_data = []
+        self.search_index = NameSearchIndex()
         self.source_model = self.create_model(folder_path, file_ext)
         self.proxy_model = MyFilter()
         self.proxy_model.setSourceModel(self.source_model)
+        self.proxy_model.setSortRole(SkinLibraryModel.SORT_ROLE)
+        self.proxy_model.setFilterRole(QtCore.Qt.UserRole)
         self.table_view.verticalHeader().hide()
-        self.source_model.setHorizontalHeaderLabels(["name", "date", "version"])
         self.table_view.setModel(self.proxy_model)
         self.table_view.setSelectionBehavior(QtWidgets.QTableView.SelectRows)
         self.table_view.setSortingEnabled(True)
         self.table_view.setColumnWidth(0, 220 * DPI_SCALE)
         self.table_view.setColumnWidth(2, 50 * DPI_SCALE)
+        self.table_view.setColumnWidth(3, 60 * DPI_SCALE)
+        self.table_view.setColumnWidth(4, 40 * DPI_SCALE)
 
-        self.source_model.dataChanged.connect(self.on_cell_changed)
         horizontal_header = self.table_view.horizontalHeader()
         horizontal_header.setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
         if self.search_le.text():
             self.update_search(self.search_le.text())
 
+        # ...rows are streamed in by a background scan
+        self.start_scan(folder_path, file_ext)
+
     def refresh_model(self):
         self.update_model(self.folder_path, self.file_ext)
         om.MGlobal.displayInfo("version processing successful")
 
     def update_search(self, text):
-        self.proxy_model.setFilterWildcard('*%s*' % text, self.case_sensitive_btn.isChecked())
+        rows = self.search_index.search(text, self.case_sensitive_btn.isChecked())
+        self.proxy_model.setFilterRows(rows, len(self.search_index))
 
     def update_sensitive(self):
         self.update_search(self.search_le.text())
@@ -484,12 +677,7 @@ class SkinTable(QtWidgets.QWidget):
         source_index = self.table_view.model().mapToSource(version_index)
         file_name = self.table_view.selectionModel().selectedIndexes()[0].data()
         file_path = os.path.join(self.folder_path, file_name + self.file_ext).replace("\\", "/")
-        existing_versions = get_existing_versions(file_path)
-        _dir = os.path.dirname(file_path)
-        _name = os.path.basename(file_path)
-        existing_version_paths = [os.path.join(_dir, "_versions", _name + ".versions", i).replace("\\", "/")
-                                  for i in existing_versions]
-        existing_version_paths.append(file_path)
+        existing_version_paths = file_versioning.getVersionPaths(file_path) + [file_path]
 
         if len(existing_version_paths) > 1:
             if self._sub_dialogs:
@@ -509,43 +697,10 @@ class SkinTable(QtWidgets.QWidget):
         self.table_view.model().sourceModel().setData(dialog.source_model_index, dialog.version_to_set)
 
     def on_close(self):
+        self.cancel_scan()
         for w in self._sub_dialogs:
             w.close()
 
-    def on_cell_changed(self, index):
-        if index.column() != 2:
-            return
-        self.table_view.model().sourceModel()
-        # update new date info
-        row = index.row()
-        latest_date_index = self.source_model.index(row, 1)
-        latest_file_name = self.source_model.index(row, 0).data() + self.file_ext
-        latest_file_path = os.path.join(self.folder_path, latest_file_name).replace("\\", "/")
-
-        all_versions = [
-            os.path.join(self.folder_path, "_versions", latest_file_name + ".versions", i).replace("\\", "/")
-            for i in get_existing_versions(latest_file_path)]
-        all_versions.append(latest_file_path)
-        new_date = datetime.fromtimestamp(os.path.getmtime(all_versions[int(index.data()) - 1])).strftime(
-            '%m/%d/%Y %H:%M')
-        self.source_model.setData(latest_date_index, new_date)
-        # assign color to row if not latest version
-        self.source_model.blockSignals(True)
-        font = QtGui.QFont()
-        if not index.data() == len(all_versions):
-            font.setBold(True)
-            for i in range(3):
-                self.source_model.setData(self.source_model.index(row, i), font, QtCore.Qt.FontRole)
-                self.source_model.setData(self.source_model.index(row, i), QtGui.QColor(255, 150, 100),
-                                          QtCore.Qt.TextColorRole)
-        else:
-            font.setBold(False)
-            for i in range(3):
-                self.source_model.setData(self.source_model.index(row, i), font, QtCore.Qt.FontRole)
-                self.source_model.setData(self.source_model.index(row, i), QtGui.QColor(200, 200, 200),
-                                          QtCore.Qt.TextColorRole)
-        self.source_model.blockSignals(False)
-
 
 class SkinIOWidget(QtWidgets.QWidget):
 
@@ -637,6 +792,9 @@ class SkinIOWidget(QtWidgets.QWidget):
         self.export_format_cb.addItems(FILE_EXTENTIONS)
         self.import_option_lb = QtWidgets.QLabel("Import Option: ")
         self.skip_already_skinned_chk = QtWidgets.QCheckBox("Skip Already Skinned")
+        self.export_option_lb = QtWidgets.QLabel("Export Option: ")
+        self.skip_unchanged_chk = QtWidgets.QCheckBox("Skip Unchanged")
+        self.skip_unchanged_chk.setToolTip("Do not rewrite (or version) skin files whose weights did not change")
         self.import_skin_btn = QtWidgets.QPushButton(" Import Skin")
         icon_path = os.path.join(ICON_DIR, "mgear_log-in.svg")
         self.import_skin_btn.setIcon(QtGui.QIcon(icon_path))
@@ -715,6 +873,8 @@ class SkinIOWidget(QtWidgets.QWidget):
         file_type_layout.addWidget(self.export_format_cb)
         file_type_layout.addWidget(self.import_option_lb)
         file_type_layout.addWidget(self.skip_already_skinned_chk)
+        file_type_layout.addWidget(self.export_option_lb)
+        file_type_layout.addWidget(self.skip_unchanged_chk)
         file_type_layout.addStretch()
         skin_io_btn_layout = QtWidgets.QHBoxLayout()
         skin_io_btn_layout.setSpacing(S)
@@ -856,6 +1016,8 @@ class SkinIOWidget(QtWidgets.QWidget):
             self.folder_path_le.text()) else None
         folder_path = QtWidgets.QFileDialog.getExistingDirectory(self, 'Select Folder', default_path)
         if folder_path:
+            # ...stop streaming the current folder, the user is moving on
+            self.skin_table.cancel_scan()
             self.folder_path_le.setText(str(folder_path))
             self.update_model()
 
@@ -874,12 +1036,11 @@ class SkinIOWidget(QtWidgets.QWidget):
         else:
             return om.MGlobal.displayInfo("Canceled")
 
-    def pick_skin_pack_as_string(self):
-        skin_pack = self.pick_skin_pack()
+    def pick_skin_pack_as_string(self, skin_pack=None):
+        skin_pack = skin_pack or self.pick_skin_pack()
         if not skin_pack:
             return
-        f = open(skin_pack)
-        objs = [str(i).split(".")[0] for i in json.load(f)["packFiles"]]
+        objs = op.readSkinPackMembers(skin_pack)
         if objs:
             return str(objs)
 
@@ -906,6 +1067,7 @@ class SkinIOWidget(QtWidgets.QWidget):
                                   useStoredList=self.obj_storage_chk.isChecked(),
                                   objList=self.obj_storage_le.text(),
                                   skip_already_skinned=self.skip_already_skinned_chk.isChecked(),
+                                  skip_unchanged=self.skip_unchanged_chk.isChecked(),
                                   )
         if not os.path.exists(CONFIG_DIR):
             os.makedirs(CONFIG_DIR)
@@ -926,6 +1088,7 @@ class SkinIOWidget(QtWidgets.QWidget):
                 self.obj_storage_le.setText(str(config["objList"]))
                 self.skin_table.update_model(config["skinPath"], self.export_format_cb.currentText())
                 self.skip_already_skinned_chk.setChecked(config["skip_already_skinned"])
+                self.skip_unchanged_chk.setChecked(config.get("skip_unchanged", False))
             except:
                 pass
 
@@ -1004,7 +1167,10 @@ class SkinIOWidget(QtWidgets.QWidget):
                 else:
                     return
         else:
-            strings = self.pick_skin_pack_as_string()
+            skin_pack = self.pick_skin_pack()
+            if not skin_pack:
+                return
+            strings = self.pick_skin_pack_as_string(skin_pack)
             if not strings:
                 return
             objs = [assert_mesh(i) for i in strings[2:-2].split("', '")]
@@ -1027,34 +1193,37 @@ class SkinIOWidget(QtWidgets.QWidget):
                 index = table_view.model().index(row, column)
                 row_data.append(index.data())
             output.append(row_data)
-        for i in output:
-            name = i[0]
-            selected_version = int(i[2])
-            latest_version_path = os.path.join(self.folder_path_le.text(),
-                                               "{}{}".format(name, file_ext)).replace("\\", "/")
-            existing_versions = get_existing_versions(latest_version_path)
-            version_count = len(existing_versions) + 1
-            # import latest version
-            if not cmds.objExists(name):
-                om.MGlobal.displayWarning("Object not found in scene: {}".format(name))
-                continue
-            elif selected_version == version_count:
-                if getSkinCluster(name) and self.skip_already_skinned_chk.isChecked():
+        with skinCluster_batch():
+            for i in output:
+                name = i[0]
+                selected_version = int(i[2])
+                latest_version_path = os.path.join(self.folder_path_le.text(),
+                                                   "{}{}".format(name, file_ext)).replace("\\", "/")
+                existing_versions = get_existing_versions(latest_version_path)
+                version_count = len(existing_versions) + 1
+                # import latest version
+                if not cmds.objExists(name):
+                    om.MGlobal.displayWarning("Object not found in scene: {}".format(name))
                     continue
-                # if self.export_format_cb.currentIndex() == 0:
-                if self.export_format_cb.currentText() == ".npySkin":
-                    npyLoadSkin(latest_version_path)
+                elif selected_version == version_count:
+                    if getSkinCluster(name) and self.skip_already_skinned_chk.isChecked():
+                        continue
+                    # if self.export_format_cb.currentIndex() == 0:
+                    if self.export_format_cb.currentText() == ".npySkin":
+                        npyLoadSkin(latest_version_path)
+                    else:
+                        folder = os.path.dirname(latest_version_path)
+                        objs = [name]
+                        op.importSkin(folder, objs, file_ext=file_ext)
                 else:
-                    folder = os.path.dirname(latest_version_path)
-                    objs = [name]
-                    op.importSkin(folder, objs, file_ext=file_ext)
-            else:
-                path = os.path.join(self.folder_path_le.text(), name + file_ext + ".versions",
-                                    existing_versions[selected_version - 1]).replace("\\", "/")
-                if getSkinCluster(name) and self.skip_already_skinned_chk.isChecked():
-                    continue
-                om.MGlobal.displayInfo("using older version: {}".format(existing_versions[selected_version - 1]))
-                op.importSkin(filePath=path, file_ext=file_ext)
+                    path = file_versioning.getVersionPath(latest_version_path, selected_version)
+                    if getSkinCluster(name) and self.skip_already_skinned_chk.isChecked():
+                        continue
+                    om.MGlobal.displayInfo("using older version: {}".format(existing_versions[selected_version - 1]))
+                    if file_ext == ".npySkin":
+                        npyLoadSkin(path)
+                    else:
+                        om.MGlobal.displayWarning("older versions can only be imported as .npySkin: {}".format(path))
 
     def export_skin(self, use_skin_pack=False):
         # sanity check
@@ -1116,12 +1285,14 @@ class SkinIOWidget(QtWidgets.QWidget):
             op.exportSkinPack(packPath=pack_path,
                               objs=selection,
                               versioning=versioning,
-                              file_ext=file_ext)
+                              file_ext=file_ext,
+                              incremental=self.skip_unchanged_chk.isChecked())
         else:
             op.exportSkin(folder_path=folder_path,
                           objs=selection,
                           versioning=versioning,
                           file_ext=file_ext,
+                          incremental=self.skip_unchanged_chk.isChecked(),
                           )
 
         self.update_model()
@@ -1136,12 +1307,17 @@ class SkinIODialog(QtWidgets.QDialog):
         self.setLayout(QtWidgets.QVBoxLayout())
         self.skin_io_widget = SkinIOWidget()
         self.layout().addWidget(self.skin_io_widget)
+        # ...the skinCluster lookups stay cached across operations while the window is open, a
+        #    window deleted without a close (shown again, module reload) releases them too
+        self.release_cache_hooks = skinCluster_cache.install_hooks()
+        self.destroyed.connect(self.release_cache_hooks)
         self.setMinimumSize(300, 150)
         self.resize(418 * DPI_SCALE, 277 * DPI_SCALE)
 
     def closeEvent(self, event):
         self.skin_io_widget.store_config_file()
         self.skin_io_widget.skin_table.on_close()
+        self.release_cache_hooks()
 
 
 class SkinIODialogDockable(MayaQWidgetDockableMixin, QtWidgets.QDialog):
@@ -1151,12 +1327,17 @@ class SkinIODialogDockable(MayaQWidgetDockableMixin, QtWidgets.QDialog):
         self.setLayout(QtWidgets.QVBoxLayout())
         self.skin_io_widget = SkinIOWidget()
         self.layout().addWidget(self.skin_io_widget)
+        # ...the skinCluster lookups stay cached across operations while the window is open, a
+        #    window deleted without a close (shown again, module reload) releases them too
+        self.release_cache_hooks = skinCluster_cache.install_hooks()
+        self.destroyed.connect(self.release_cache_hooks)
         self.setMinimumSize(300, 150)
         self.resize(418 * DPI_SCALE, 277 * DPI_SCALE * 2)
 
     def closeEvent(self, event):
         self.skin_io_widget.store_config_file()
         self.skin_io_widget.skin_table.on_close()
+        self.release_cache_hooks()
 
 
 def show(dock=False):
@@ -1,89 +1,602 @@
+import hashlib
+import json
 import os
 import re
 import shutil
+import threading
+import time
+from datetime import datetime
+from functools import wraps
 
 import maya.OpenMaya as om
 
+VERSIONS_DIR = "_versions"
+BLOBS_DIR = "_blobs"
+CACHE_DIR = "_cache"
+MANIFEST_EXT = ".json"
+DELTA_EXT = ".delta"
+# ...every Nth version is kept as a full copy, this bounds the delta chain to rebuild a version
+KEYFRAME_INTERVAL = 10
+# ...a delta bigger than this fraction of the full file is not worth it
+DELTA_MAX_RATIO = 0.5
+# ...rebuilt delta versions kept around for repeated imports
+CACHE_SIZE = 8
+# ...seconds a blob store file is kept after it was written or reused, another session can be
+#    between storing a blob and writing the manifest that refers to it
+GC_GRACE_PERIOD = 24 * 60 * 60
+
+# ...the versioning of a file is serialized, its manifest is read, changed and written back.
+#    Files of a folder are versioned in parallel (exports write from a thread pool), the blob
+#    store they share is content addressed and only written with atomic renames. The locks only
+#    cover this process, other maya sessions on the same folder are kept safe by the atomic
+#    renames and the GC_GRACE_PERIOD of collectBlobs
+_fileLocks = {}
+_fileLocksGuard = threading.Lock()
+# ...a blob reused by one file is not deleted as superseded by another one in between
+_blobReuseLock = threading.Lock()
+
+# ...file extension -> codec with encode(basePath, targetPath, deltaPath) -> bool and
+#    decode(basePath, deltaPath, outPath), see registerDeltaCodec
+deltaCodecs = {}
+
+versionRe = re.compile(r"^(.+)\.v(\d+)(.*)|()$")
 
-def getVersions(path, new=True, numberOfVersionOldToArchive=0):
-    """ Get the (version, path) to the latest (highest+1) backup of the given folder or file.
-        This looks in the ".versions" folder.
-    """
-    if not os.path.exists(path):
-        raise ValueError("Path {}0 does not exist".format(path))
 
-    versionRe = re.compile(r"^(.+)\.v(\d+)(.*)|()$")
+def _fileLock(path):
+    key = os.path.normcase(os.path.abspath(os.path.join(*_splitPath(path))))
+    with _fileLocksGuard:
+        return _fileLocks.setdefault(key, threading.RLock())
+
+
+def _lockedFile(func):
+    @wraps(func)
+    def wrapper(path, *args, **kwargs):
+        with _fileLock(path):
+            return func(path, *args, **kwargs)
+    return wrapper
+
+
+def _tempPath(path):
+    """ a temp file next to path, unique per process and thread """
+    return "%s.%d.%d.tmp" % (path, os.getpid(), threading.current_thread().ident)
+
+
+def _splitPath(path):
+    """ (parentFolder, fileName) of the versioned asset, also for a path inside its ".versions" folder """
     parentFolder, fileName = os.path.split(path)
     # testFields if in a backup version folder
     m = versionRe.match(fileName)
     if m:
         parentFolderName = os.path.basename(parentFolder)
         if parentFolderName == "%s%s.versions" % (m.group(1), m.group(3)):
-            parentFolder = os.path.dirname(parentFolder)
+            parentFolder = os.path.dirname(os.path.dirname(parentFolder))
             fileName = "%s%s" % (m.group(1), m.group(3))
+    return parentFolder, fileName
+
+
+def getVersionFolder(path):
+    parentFolder, fileName = _splitPath(path)
+    return os.path.join(parentFolder, VERSIONS_DIR, fileName + ".versions").replace("\\", "/")
+
+
+def getManifestPath(path):
+    """ the manifest sits next to the ".versions" folder: _versions/<file>.versions.json """
+    return getVersionFolder(path) + MANIFEST_EXT
+
+
+def getBlobFolder(path):
+    """ content addressed store shared by all the files versioned in the same folder """
+    parentFolder, fileName = _splitPath(path)
+    return os.path.join(parentFolder, VERSIONS_DIR, BLOBS_DIR).replace("\\", "/")
+
+
+def getCacheFolder(path):
+    parentFolder, fileName = _splitPath(path)
+    return os.path.join(parentFolder, VERSIONS_DIR, CACHE_DIR).replace("\\", "/")
+
+
+def registerDeltaCodec(ext, codec):
+    """ store the versions of files with this extension as deltas against the next version """
+    deltaCodecs[ext] = codec
+
+
+def versionEntryPath(path, entry):
+    """ path holding the content of a manifest entry, its blob or (versioned before blobs) its own file
+
+    Delta versions point into the cache, use getVersionPath (or materializeVersion) to rebuild them.
+    """
+    if entry.get("delta"):
+        return "%s/%s" % (getCacheFolder(path), entry["blob"])
+    if entry.get("blob"):
+        return "%s/%s" % (getBlobFolder(path), entry["blob"])
+    return "%s/%s" % (getVersionFolder(path), entry["file"])
+
+
+def _storedName(entry):
+    """ name of the file the blob store keeps for an entry """
+    return entry.get("delta") or entry.get("blob")
+
 
-    # if not then find version number
-    backupFolderName = fileName + ".versions"
-    backupFolderPath = os.path.join(parentFolder, "_versions", backupFolderName)
-    if os.path.exists(backupFolderPath):
-        versions = []
-        for file in os.listdir(backupFolderPath):
-            m = versionRe.match(file)
-            if m:
-                versions.append(int(m.group(2)))
-        version = max(versions or [0])
+def _pruneCache(path):
+    cacheFolder = getCacheFolder(path)
+    files = []
+    for file_ in os.listdir(cacheFolder):
+        try:
+            if not file_.endswith(".tmp"):
+                files.append((os.path.getmtime(os.path.join(cacheFolder, file_)), file_))
+        except OSError:
+            # ...pruned by another thread meanwhile
+            pass
+    for mtime, file_ in sorted(files)[:-CACHE_SIZE]:
+        try:
+            os.remove(os.path.join(cacheFolder, file_))
+        except OSError:
+            pass
+
+
+def materializeVersion(path, entries, index):
+    """ make sure the content of entries[index] exists on disk, rebuilding it from its delta chain
+
+    Returns:
+        str: path of the version content
+    """
+    entry = entries[index]
+    versionPath = versionEntryPath(path, entry)
+    if not entry.get("delta"):
+        return versionPath
+    if os.path.exists(versionPath):
+        # ...keep recently used versions in the cache
+        os.utime(versionPath, None)
+        return versionPath
+
+    basePath = _contentPath(path, entries, entry["base"], start=index + 1)
+    codec = deltaCodecs[os.path.splitext(entry["blob"])[1]]
+    cacheFolder = getCacheFolder(path)
+    if not os.path.isdir(cacheFolder):
+        os.makedirs(cacheFolder, exist_ok=True)
+    tempPath = _tempPath(versionPath)
+    codec.decode(basePath, "%s/%s" % (getBlobFolder(path), entry["delta"]), tempPath)
+    os.replace(tempPath, versionPath)
+    _pruneCache(path)
+    return versionPath
+
+
+def _contentPath(path, entries, contentHash, start=0):
+    """ path of any entry holding the given content, deltas are rebuilt """
+    for i in range(start, len(entries)):
+        if entries[i].get("hash") == contentHash:
+            return materializeVersion(path, entries, i)
+    raise ValueError("version content {} not found in the manifest of {}".format(contentHash, path))
+
+
+@_lockedFile
+def getVersionPath(path, version):
+    """ path of the content of a backed up version (1 is the oldest), delta versions are rebuilt """
+    entries = readManifest(path)["versions"]
+    return materializeVersion(path, entries, version - 1)
+
+
+def versionFileName(fileName, version):
+    fileNameSplit = fileName.rsplit(".", 1)
+    versionFileName_ = "%s.v%04d" % (fileNameSplit[0], version)
+    if len(fileNameSplit) > 1:
+        versionFileName_ += ".%s" % fileNameSplit[1]
+    return versionFileName_
+
+
+def fileHash(path, blockSize=1 << 20):
+    if not os.path.isfile(path):
+        return None
+    sha = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(blockSize), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _manifestEntry(version, fileName, path, contentHash=None, blob=None):
+    return dict(version=version,
+                file=fileName,
+                time=os.path.getmtime(path),
+                size=os.path.getsize(path) if os.path.isfile(path) else 0,
+                hash=contentHash,
+                blob=blob)
+
+
+def _blobName(fileName, contentHash):
+    ext = os.path.splitext(fileName)[1]
+    return contentHash + ext
+
+
+def _storeBlob(path, filePath, contentHash, move=False):
+    """ put a file into the blob store, nothing is written if the content is already there
+
+    Returns:
+        str: blob name
+    """
+    parentFolder, fileName = _splitPath(path)
+    blobFolder = getBlobFolder(path)
+    blob = _blobName(fileName, contentHash)
+    blobPath = "%s/%s" % (blobFolder, blob)
+    try:
+        # ...already stored, the grace period of collectBlobs starts again
+        with _blobReuseLock:
+            os.utime(blobPath, None)
+    except OSError:
+        pass
+    else:
+        if move:
+            os.remove(filePath)
+        return blob
+    if not os.path.isdir(blobFolder):
+        os.makedirs(blobFolder, exist_ok=True)
+    tempPath = _tempPath(blobPath)
+    if move:
+        os.rename(filePath, tempPath)
     else:
-        versions = []
-        version = 0
+        shutil.copy2(filePath, tempPath)
+    # ...copy2 and rename keep the mtime of the file, the blob is new from now
+    os.utime(tempPath, None)
+    os.replace(tempPath, blobPath)
+    return blob
+
+
+def _referencedBlobs(path):
+    """ (stored blob names, content blob names) referenced by any manifest of the "_versions" folder """
+    versionsRoot = os.path.dirname(getVersionFolder(path))
+    stored, contents = set(), set()
+    for file_ in os.listdir(versionsRoot):
+        if not file_.endswith(".versions" + MANIFEST_EXT):
+            continue
+        try:
+            with open(os.path.join(versionsRoot, file_)) as fh:
+                for e in json.load(fh)["versions"]:
+                    stored.add(_storedName(e))
+                    contents.add(e.get("blob"))
+        except (OSError, ValueError, KeyError):
+            # ...an unreadable manifest keeps every blob alive
+            return None
+    return stored, contents
+
+
+def collectBlobs(path, gracePeriod=GC_GRACE_PERIOD):
+    """ delete the blobs (and rebuilt cache files) no manifest refers to anymore
+
+    This reads every manifest of the folder, it is only run on an explicit archiveVersions, not
+    per version. Files written or reused in the last gracePeriod seconds are kept, another
+    session may be about to record them in its manifest.
+    """
+    referenced = _referencedBlobs(path)
+    if referenced is None:
+        return
+    stored, contents = referenced
+    expired = time.time() - gracePeriod
+    for folder, keep in ((getBlobFolder(path), stored), (getCacheFolder(path), contents)):
+        if not os.path.isdir(folder):
+            continue
+        for file_ in os.listdir(folder):
+            if file_ in keep or file_.endswith(".tmp"):
+                continue
+            filePath = os.path.join(folder, file_)
+            try:
+                if os.path.getmtime(filePath) < expired:
+                    os.remove(filePath)
+            except OSError:
+                # ...collected by another session meanwhile
+                pass
+        try:
+            if not os.listdir(folder):
+                os.rmdir(folder)
+        except OSError:
+            pass
+
+
+def _adoptLegacyVersions(path, manifest):
+    """ move the per version files of a manifest entry into the blob store """
+    for entry in manifest["versions"]:
+        if entry.get("blob"):
+            continue
+        versionPath = versionEntryPath(path, entry)
+        if not os.path.isfile(versionPath):
+            continue
+        entry["hash"] = entry.get("hash") or fileHash(versionPath)
+        entry["blob"] = _storeBlob(path, versionPath, entry["hash"], move=True)
+
+
+def readManifest(path):
+    """ versions of a file as recorded in its manifest
+
+    Folders versioned before the manifest existed have none, their ".versions" folder is
+    listed once to build it (without hashes), it is written on the next versionFile.
+
+    Returns:
+        dict: {"file": fileName, "versions": [{"version", "file", "time", "size", "hash"}, ...]}
+    """
+    parentFolder, fileName = _splitPath(path)
+    manifestPath = getManifestPath(path)
+    if os.path.exists(manifestPath):
+        with open(manifestPath) as fh:
+            return json.load(fh)
+
+    manifest = dict(file=fileName, versions=[])
+    backupFolderPath = getVersionFolder(path)
+    if os.path.isdir(backupFolderPath):
+        for file_ in os.listdir(backupFolderPath):
+            m = versionRe.match(file_)
+            if m and m.group(2):
+                manifest["versions"].append(
+                    _manifestEntry(int(m.group(2)), file_, os.path.join(backupFolderPath, file_)))
+        manifest["versions"].sort(key=lambda e: e["version"])
+    return manifest
+
+
+def writeManifest(path, manifest):
+    """ write the manifest atomically, readers never see a half written file """
+    manifestPath = getManifestPath(path)
+    if not manifest["versions"]:
+        if os.path.exists(manifestPath):
+            os.remove(manifestPath)
+        return
+    folder = os.path.dirname(manifestPath)
+    if not os.path.isdir(folder):
+        os.makedirs(folder, exist_ok=True)
+    tempPath = _tempPath(manifestPath)
+    with open(tempPath, "w") as fh:
+        json.dump(manifest, fh, indent=4, sort_keys=True)
+    os.replace(tempPath, manifestPath)
+
+
+def getVersionPaths(path):
+    """ paths of the backed up versions, oldest first, the current file is not included """
+    return [versionEntryPath(path, e) for e in readManifest(path)["versions"]]
+
+
+def _versionsToArchive(versions, numberOfVersionOldToArchive):
+    if not numberOfVersionOldToArchive:
+        return set()
+    n = (numberOfVersionOldToArchive - 1) * -1
+    keeplist = versions[n:]
+    return set(versions) - set(keeplist)
+
+
+def getVersions(path, new=True, numberOfVersionOldToArchive=0):
+    """ Get the (version, path) to the latest (highest+1) backup of the given folder or file.
+        This looks in the manifest of the ".versions" folder.
+    """
+    if not os.path.exists(path):
+        raise ValueError("Path {}0 does not exist".format(path))
+
+    parentFolder, fileName = _splitPath(path)
+    backupFolderPath = getVersionFolder(path)
+    entries = readManifest(path)["versions"]
+    versions = [e["version"] for e in entries]
+    version = max(versions or [0])
 
     version += 1
-    backupFolderPath = backupFolderPath.replace("\\", "/")
-    fileNameSplit = fileName.rsplit(".", 1)
-    latestFileName = "%s.v%04d" % (fileNameSplit[0], version)
-    if len(fileNameSplit) > 1: latestFileName += ".%s" % fileNameSplit[1]
-    newVersion = "%s/%s" % (backupFolderPath, latestFileName)
-
-    archiveList = []
-    if numberOfVersionOldToArchive:
-        n = (numberOfVersionOldToArchive - 1) * -1
-        keeplist = versions[n:]
-        removeList = list(set(versions) - set(keeplist))
-        for version in removeList:
-            latestFileName = "%s.v%04d" % (fileNameSplit[0], version)
-            if len(fileNameSplit) > 1: latestFileName += ".%s" % fileNameSplit[1]
-            filePath = "%s/%s" % (backupFolderPath, latestFileName)
-            archiveList.append(filePath)
-
-    print(newVersion, archiveList, version)
+    newVersion = "%s/%s" % (backupFolderPath, versionFileName(fileName, version))
+
+    removeList = _versionsToArchive(versions, numberOfVersionOldToArchive)
+    archiveList = [versionEntryPath(path, e) for e in entries if e["version"] in removeList]
     return newVersion, archiveList, version
 
 
-def versionFile(path, numberOfVersionToKeep=0):
+def _deltaRoundTrips(codec, basePath, deltaPath, contentHash):
+    """ the full copy is dropped once the delta is stored, make sure it rebuilds the same bytes """
+    checkPath = deltaPath + ".check.tmp"
+    try:
+        codec.decode(basePath, deltaPath, checkPath)
+        return fileHash(checkPath) == contentHash
+    finally:
+        if os.path.exists(checkPath):
+            os.remove(checkPath)
+
+
+def _compactVersions(path, entries, sources):
+    """ store every version as a delta against the next one, keyframes and the newest stay full
+
+    Args:
+        path(str): the versioned file
+        entries(list): manifest entries in their new order, updated in place
+        sources(list): entries in their old representation, used to look content up
+
+    Returns:
+        list: names of the full blobs replaced by a delta, see _dropSupersededBlobs
+    """
+    codec = deltaCodecs.get(os.path.splitext(_splitPath(path)[1])[1])
+    blobFolder = getBlobFolder(path)
+    superseded = []
+    for i in reversed(range(len(entries))):
+        entry = entries[i]
+        if not entry.get("blob"):
+            continue
+        base = entries[i + 1] if i + 1 < len(entries) else None
+        if base is not None and (codec is None or not base.get("blob")
+                                 or entry["version"] % KEYFRAME_INTERVAL == 0):
+            base = None
+
+        if base is not None and base["hash"] == entry["hash"]:
+            # ...same content, same representation
+            for key in ("delta", "base"):
+                entry.pop(key, None)
+                if base.get(key):
+                    entry[key] = base[key]
+            continue
+        if base is not None and entry.get("delta") and entry.get("base") == base["hash"]:
+            continue
+        if base is None and not entry.get("delta"):
+            continue
+
+        contentPath = _contentPath(path, sources, entry["hash"])
+        if base is not None:
+            delta = "%s.%s%s" % (entry["hash"], base["hash"], DELTA_EXT)
+            deltaPath = "%s/%s" % (blobFolder, delta)
+            tempPath = _tempPath(deltaPath)
+            basePath = _contentPath(path, sources, base["hash"])
+            if codec.encode(basePath, contentPath, tempPath):
+                if os.path.getsize(tempPath) <= DELTA_MAX_RATIO * os.path.getsize(contentPath) \
+                        and _deltaRoundTrips(codec, basePath, tempPath, entry["hash"]):
+                    os.replace(tempPath, deltaPath)
+                    if not entry.get("delta"):
+                        superseded.append(entry["blob"])
+                    entry.update(delta=delta, base=base["hash"])
+                    continue
+                os.remove(tempPath)
+        entry["blob"] = _storeBlob(path, contentPath, entry["hash"])
+        entry.pop("delta", None)
+        entry.pop("base", None)
+    return superseded
+
+
+def _dropSupersededBlobs(path, entries, blobs, since):
+    """ delete the full blobs replaced by deltas once no manifest entry stores them anymore
+
+    Called with the manifest of path written. The other manifests of the folder are only read
+    when this one does not store a blob itself, blobs are shared by identical contents. A blob
+    reused after since (the previous manifest write of path) may be about to be recorded by
+    another file, it is left for collectBlobs.
+    """
+    stored = {_storedName(e) for e in entries}
+    blobs = [blob for blob in blobs if blob not in stored]
+    if not blobs:
+        return
+    referenced = _referencedBlobs(path)
+    if referenced is None:
+        return
+    for blob in blobs:
+        if blob in referenced[0]:
+            continue
+        blobPath = "%s/%s" % (getBlobFolder(path), blob)
+        try:
+            with _blobReuseLock:
+                if os.path.getmtime(blobPath) < since:
+                    os.remove(blobPath)
+        except OSError:
+            # ...removed by another thread meanwhile
+            pass
+
+
+def _manifestTime(path):
+    try:
+        return os.path.getmtime(getManifestPath(path))
+    except OSError:
+        return 0.0
+
+
+@_lockedFile
+def versionFile(path, numberOfVersionToKeep=0, log=None):
     """ Create a Backup of the given folder or file into a ".versions" folder.
         This is not a publishing.
+
+        Only the manifest of this file is read, except when a full copy is replaced by a delta:
+        it is deleted right away unless another manifest stores it too. Blobs of versions past
+        numberOfVersionToKeep stay in the store until collectBlobs runs.
+
+    Args:
+        log(callable): called with the info messages, om.MGlobal.displayInfo by default. Maya
+            output is main thread only, workers pass their own and display them later
     """
     moveFiles = False
     # path = os.path.abspath(path)
+    log = log or om.MGlobal.displayInfo
 
     if not os.path.exists(path):
-        om.MGlobal.displayInfo("Path {} does not exist".format(path))
+        log("Path {} does not exist".format(path))
         return
 
+    manifest = readManifest(path)
     newBackupPath, archiveList, version = getVersions(path, numberOfVersionOldToArchive=numberOfVersionToKeep)
-    if version == 1:
-        os.makedirs(os.path.dirname(newBackupPath), exist_ok=True)
-    parentFolder = os.path.dirname(newBackupPath)
-    if not os.path.exists(parentFolder):
-        os.mkdir(parentFolder)
-
-    if moveFiles:
-        shutil.move(path, newBackupPath)
-    else:
-        if os.path.isfile(path):
+    fileName = os.path.basename(newBackupPath)
+    log("Backup > {}".format(newBackupPath))
+
+    if moveFiles or not os.path.isfile(path):
+        # ...folders are not content addressed
+        if version == 1:
+            os.makedirs(os.path.dirname(newBackupPath), exist_ok=True)
+        if moveFiles:
+            shutil.move(path, newBackupPath)
+        elif os.path.isfile(path):
             shutil.copy2(path, newBackupPath)
         else:
             shutil.copytree(path, newBackupPath)
+        entry = _manifestEntry(version, fileName, newBackupPath, fileHash(newBackupPath))
+    else:
+        # ...a file that was not touched since the last version keeps the recorded hash
+        last = manifest["versions"][-1] if manifest["versions"] else {}
+        st = os.stat(path)
+        if last.get("hash") and last.get("time") == st.st_mtime and last.get("size") == st.st_size:
+            contentHash = last["hash"]
+        else:
+            contentHash = fileHash(path)
+        blob = _storeBlob(path, path, contentHash)
+        entry = _manifestEntry(version, fileName, path, contentHash, blob)
+
+    sources = [dict(e) for e in manifest["versions"]] + [entry]
+    removeList = _versionsToArchive([e["version"] for e in manifest["versions"]], numberOfVersionToKeep)
+    manifest["versions"] = [e for e in manifest["versions"] if e["version"] not in removeList] + [entry]
+    since = _manifestTime(path)
+    superseded = _compactVersions(path, manifest["versions"], sources)
+    writeManifest(path, manifest)
+    _dropSupersededBlobs(path, manifest["versions"], superseded, since)
 
     for each in archiveList:
-        os.remove(each)
-        om.MGlobal.displayInfo("File Deleted > {}".format(each))
+        # ...blobs can be shared, they are collected once no entry refers to them
+        if os.path.dirname(each) == getVersionFolder(path) and os.path.exists(each):
+            os.remove(each)
+        log("File Deleted > {}".format(each))
+
+
+@_lockedFile
+def archiveVersions(path, versions):
+    """ move versions out of the history into "_archive/<time stamp>" next to the file
+
+    Versions are numbered like the version table: 1..n are the backups, n + 1 is the file itself.
+    The remaining versions are renumbered from 1 and the newest remaining one becomes the file.
+    Backups live in the blob store, so this only rewrites the manifest, archived versions are copied
+    out (deltas rebuilt) and their blobs collected once no version refers to them.
+
+    Returns:
+        str: the archive folder
+    """
+    parentFolder, fileName = _splitPath(path)
+    filePath = os.path.join(parentFolder, fileName).replace("\\", "/")
+    backupFolderPath = getVersionFolder(path)
+    manifest = readManifest(path)
+    _adoptLegacyVersions(path, manifest)
+    entries = manifest["versions"]
+
+    archived = set(versions)
+    if len(archived) >= len(entries) + 1:
+        raise ValueError("Not allowed to archive all versions!")
+
+    archiveDir = os.path.join(parentFolder, "_archive", datetime.now().strftime('%Y-%m-%d-%H%M%S'))
+    archiveDir = archiveDir.replace("\\", "/")
+    if archived and not os.path.exists(archiveDir):
+        os.makedirs(archiveDir)
+    om.MGlobal.displayInfo("archiving files to -> {}".format(archiveDir))
+
+    remaining = []
+    for i, entry in enumerate(entries):
+        if i + 1 in archived:
+            shutil.copy2(materializeVersion(path, entries, i), "%s/%s" % (archiveDir, entry["file"]))
+        else:
+            remaining.append(i)
+
+    if len(entries) + 1 in archived:
+        # ...the current file goes, the newest remaining version takes its place
+        os.rename(filePath, "%s/%s" % (archiveDir, versionFileName(fileName, len(entries) + 1)))
+        newest = remaining.pop()
+        tempPath = _tempPath(filePath)
+        shutil.copy2(materializeVersion(path, entries, newest), tempPath)
+        os.replace(tempPath, filePath)
+
+    # ...renumbered versions may need another delta base or become keyframes
+    manifest["versions"] = [dict(entries[index], version=i + 1, file=versionFileName(fileName, i + 1))
+                            for i, index in enumerate(remaining)]
+    since = _manifestTime(path)
+    superseded = _compactVersions(path, manifest["versions"], entries)
+    writeManifest(path, manifest)
+    _dropSupersededBlobs(path, manifest["versions"], superseded, since)
+    collectBlobs(path)
+    if os.path.isdir(backupFolderPath) and not os.listdir(backupFolderPath):
+        os.rmdir(backupFolderPath)
+    return archiveDir
@@ -0,0 +1,167 @@
+""" cached, scandir based index of a skin library folder and its version manifests
+
+A folder is listed once with os.scandir, and the listing (with the file stats) is cached
+against the folder mtime. A refresh only re-lists folders whose mtime changed. Overwriting
+a file in place does not touch the folder mtime, so writers call invalidate() on the folder.
+"""
+import json
+import os
+import threading
+
+from .file_versioning import VERSIONS_DIR, MANIFEST_EXT
+
+
+class LibraryEntry(object):
+    __slots__ = ("name", "path", "mtime", "size", "versions", "info")
+
+    def __init__(self, name, path, mtime, size, versions, info=None):
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self.size = size
+        self.versions = versions
+        self.info = info
+
+
+class LibraryIndex(object):
+
+    def __init__(self):
+        # ...folder path -> (folder mtime, {name: (mtime, size, is_dir)})
+        self._listings = {}
+        # ...(path, mtime, size) -> LibraryEntry
+        self._entries = {}
+        # ...(manifest path, mtime, size) -> manifest version entries
+        self._manifests = {}
+        # ...the ui scans from a worker thread while the main thread looks up versions
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.normpath(path))
+
+    def listing(self, folder_path, force=False):
+        """ name -> (mtime, size, is_dir) of a folder, re-listed only when the folder mtime changed """
+        key = self._key(folder_path)
+        try:
+            folder_mtime = os.stat(folder_path).st_mtime
+        except OSError:
+            self._listings.pop(key, None)
+            return {}
+
+        with self._lock:
+            cached = self._listings.get(key)
+            if cached and cached[0] == folder_mtime and not force:
+                return cached[1]
+
+        listing = {}
+        try:
+            with os.scandir(folder_path) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat()
+                        listing[entry.name] = (st.st_mtime, st.st_size, entry.is_dir())
+                    except OSError:
+                        continue
+        except OSError:
+            self._listings.pop(key, None)
+            return {}
+        with self._lock:
+            self._listings[key] = (folder_mtime, listing)
+        return listing
+
+    def stat(self, file_path):
+        """ (mtime, size) of a file from the cached listing of its folder, None if it does not exist """
+        folder_path, name = os.path.split(os.path.normpath(file_path))
+        found = self.listing(folder_path).get(name)
+        return found[:2] if found else None
+
+    def version_entries(self, file_path):
+        """ manifest entries of "_versions/<file>.versions.json", oldest first
+
+        The manifest is parsed once per (path, mtime, size). Version folders without a manifest
+        (versioned before it existed) are listed instead.
+        """
+        folder_path, name = os.path.split(os.path.normpath(file_path))
+        found = self.listing(folder_path).get(VERSIONS_DIR)
+        if not found or not found[2]:
+            return []
+        versions_root = os.path.join(folder_path, VERSIONS_DIR)
+        versions_listing = self.listing(versions_root)
+
+        manifest_name = name + ".versions" + MANIFEST_EXT
+        found = versions_listing.get(manifest_name)
+        if found:
+            manifest_path = os.path.join(versions_root, manifest_name)
+            key = (self._key(manifest_path),) + found[:2]
+            with self._lock:
+                entries = self._manifests.get(key)
+            if entries is None:
+                try:
+                    with open(manifest_path) as fh:
+                        entries = json.load(fh)["versions"]
+                except (OSError, ValueError, KeyError):
+                    entries = []
+                with self._lock:
+                    self._manifests[key] = entries
+            return entries
+
+        found = versions_listing.get(name + ".versions")
+        if not found or not found[2]:
+            return []
+        listing = self.listing(os.path.join(versions_root, name + ".versions"))
+        return [dict(file=file_, time=listing[file_][0], size=listing[file_][1])
+                for file_ in sorted(listing) if not listing[file_][2]]
+
+    def versions(self, file_path):
+        """ file names of the backed up versions, oldest first """
+        return [e["file"] for e in self.version_entries(file_path)]
+
+    def entries(self, folder_path, file_ext, info_reader=None, force=False):
+        """ list version of iter_entries """
+        return list(self.iter_entries(folder_path, file_ext, info_reader=info_reader, force=force))
+
+    def iter_entries(self, folder_path, file_ext, info_reader=None, force=False):
+        """
+        Args:
+            folder_path(str): skin library folder
+            file_ext(str): only files with this extension are returned
+            info_reader(callable): path -> dict of file metadata, called once per (path, mtime, size)
+            force(bool): re-list the folder even if its mtime did not change
+
+        Yields:
+            LibraryEntry: sorted by file name
+        """
+        if not folder_path or not os.path.isdir(folder_path):
+            return
+        listing = self.listing(folder_path, force=force)
+
+        for name in sorted(listing):
+            mtime, size, is_dir = listing[name]
+            if is_dir or not name.endswith(file_ext):
+                continue
+            path = os.path.join(folder_path, name)
+            key = (self._key(path), mtime, size)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = LibraryEntry(name, path, mtime, size, None)
+                    self._entries[key] = entry
+            # ...manifests are cached on their own stat, so this is cheap when nothing changed
+            entry.versions = self.versions(path)
+            if entry.info is None and info_reader is not None:
+                entry.info = info_reader(path)
+            yield entry
+
+    def invalidate(self, folder_path=None):
+        """ forget the cached listing of a folder, or of all folders """
+        with self._lock:
+            if folder_path is None:
+                self._listings.clear()
+                self._entries.clear()
+                self._manifests.clear()
+            else:
+                self._listings.pop(self._key(folder_path), None)
+
+
+# ...shared by the skin table, the version table and the operations writing to the library
+library_index = LibraryIndex()
@@ -0,0 +1,70 @@
+""" prebuilt name index for the skin table search box
+
+The search text keeps the MyFilter.setFilterWildcard rules: whitespace is ignored, terms are
+comma separated, "*" is a wildcard and a term matches anywhere in the name. The lowercase names
+are built once, literal terms are answered with a plain substring test and only wildcard terms
+go through a (cached, compiled) regex.
+"""
+import re
+
+
+def parse_terms(text):
+    """ split search text into terms, None means everything matches """
+    text = re.sub(r"\s+", "", text or "")
+    terms = [t for t in text.split(",") if t]
+    if not terms or any(not t.replace("*", "") for t in terms):
+        return None
+    return terms
+
+
+class NameSearchIndex(object):
+
+    def __init__(self, names=()):
+        self._names = {True: [], False: []}
+        self._patterns = {}
+        self.add(names)
+
+    def __len__(self):
+        return len(self._names[True])
+
+    def add(self, names):
+        """ append names, their rows follow the rows already in the index """
+        for name in names:
+            self._names[True].append(name)
+            self._names[False].append(name.lower())
+
+    def _pattern(self, pieces):
+        if pieces not in self._patterns:
+            # ...greedy is fine, only the existence of a match counts
+            self._patterns[pieces] = re.compile(".*".join(re.escape(p) for p in pieces))
+        return self._patterns[pieces]
+
+    def search(self, text, case_sensitive=True, start_row=0):
+        """
+        Args:
+            text(str): raw search box text
+            case_sensitive(bool): match case
+            start_row(int): only rows from this one on are searched (for rows appended later)
+
+        Returns:
+            set: matching rows, None if every row matches
+        """
+        terms = parse_terms(text)
+        if terms is None:
+            return None
+        names = self._names[case_sensitive]
+        if start_row:
+            names = names[start_row:]
+
+        rows = set()
+        for term in terms:
+            term = term.strip("*") if case_sensitive else term.strip("*").lower()
+            if "*" not in term:
+                rows.update(i for i, name in enumerate(names, start_row) if term in name)
+            else:
+                # ...cheap substring pre-test on the outer pieces before the regex
+                pieces = tuple(p for p in term.split("*") if p)
+                first, last, search = pieces[0], pieces[-1], self._pattern(pieces).search
+                rows.update(i for i, name in enumerate(names, start_row)
+                            if first in name and last in name and search(name))
+        return rows
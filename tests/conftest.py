@@ -0,0 +1,41 @@
+""" the numpy and utils modules are imported without running the Qt parts of the package
+
+skin_io_manager/__init__.py and skin_io_manager/utils/__init__.py import Qt, they are replaced by
+empty packages over the same folders so e.g. skin_io_manager.skin.npy_weights imports on its own.
+Without maya, empty maya modules stand in for it: the modules only use them inside functions,
+apart from MGlobal.displayInfo, the default log of file_versioning.
+"""
+import os
+import sys
+import types
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "skin_io_manager")
+MAYA_MODULES = ("maya", "maya.cmds", "maya.mel", "maya.OpenMaya", "maya.api", "maya.api.OpenMaya",
+                "maya.api.OpenMayaAnim")
+
+
+def _stub_package(name, path):
+    if name not in sys.modules:
+        package = types.ModuleType(name)
+        package.__path__ = [os.path.normpath(path)]
+        sys.modules[name] = package
+
+
+def _fake_maya():
+    for name in MAYA_MODULES:
+        module = types.ModuleType(name)
+        sys.modules[name] = module
+        parent, _, child = name.rpartition(".")
+        if parent:
+            setattr(sys.modules[parent], child, module)
+    sys.modules["maya.OpenMaya"].MGlobal = type("MGlobal", (object,), {
+        "displayInfo": staticmethod(lambda message: None)})
+
+
+try:
+    import maya.cmds  # noqa: F401
+except ImportError:
+    _fake_maya()
+
+_stub_package("skin_io_manager", ROOT)
+_stub_package("skin_io_manager.utils", os.path.join(ROOT, "utils"))
@@ -0,0 +1,296 @@
+""" headless tests of the blob store, manifest and renumbering of utils/file_versioning
+
+file_versioning is loaded on its own, the skin_io_manager package needs maya and Qt. Only
+MGlobal.displayInfo is used from maya, it is faked when maya is not there.
+"""
+import importlib.util
+import json
+import os
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+MODULE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "skin_io_manager", "utils", "file_versioning.py")
+
+
+def _load_file_versioning():
+    try:
+        import maya.OpenMaya  # noqa: F401
+    except ImportError:
+        maya = types.ModuleType("maya")
+        openMaya = types.ModuleType("maya.OpenMaya")
+        openMaya.MGlobal = type("MGlobal", (object,), {"displayInfo": staticmethod(lambda message: None)})
+        maya.OpenMaya = openMaya
+        sys.modules.setdefault("maya", maya)
+        sys.modules.setdefault("maya.OpenMaya", openMaya)
+    spec = importlib.util.spec_from_file_location("file_versioning", MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+fv = _load_file_versioning()
+
+
+class PrefixDeltaCodec(object):
+    """ a delta is the length of the prefix shared with the base and the rest of the target """
+
+    def encode(self, basePath, targetPath, deltaPath):
+        with open(basePath, "rb") as fh:
+            base = fh.read()
+        with open(targetPath, "rb") as fh:
+            target = fh.read()
+        n = 0
+        while n < min(len(base), len(target)) and base[n] == target[n]:
+            n += 1
+        with open(deltaPath, "wb") as fh:
+            fh.write(b"%d\n" % n + target[n:])
+        return True
+
+    def decode(self, basePath, deltaPath, outPath):
+        with open(basePath, "rb") as fh:
+            base = fh.read()
+        with open(deltaPath, "rb") as fh:
+            n, rest = fh.read().split(b"\n", 1)
+        with open(outPath, "wb") as fh:
+            fh.write(base[:int(n)] + rest)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    return str(tmp_path).replace("\\", "/")
+
+
+@pytest.fixture
+def delta_codec():
+    fv.registerDeltaCodec(".skin", PrefixDeltaCodec())
+    yield
+    fv.deltaCodecs.pop(".skin", None)
+
+
+def _write(path, content):
+    with open(path, "wb") as fh:
+        fh.write(content)
+    # ...a new mtime for every write, the unchanged file check goes by mtime and size
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000))
+
+
+def _read(path):
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+def _content(i):
+    # ...a long shared prefix so the prefix deltas are worth storing
+    return b"x" * 1000 + b"version %d" % i
+
+
+def _export(path, contents):
+    """ write and version each content like a versioned export does """
+    for content in contents:
+        if os.path.exists(path):
+            fv.versionFile(path)
+        _write(path, content)
+
+
+def _blobs(path):
+    folder = fv.getBlobFolder(path)
+    return sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+
+
+def _age(folder, seconds):
+    for file_ in os.listdir(folder):
+        filePath = os.path.join(folder, file_)
+        mtime = os.path.getmtime(filePath) - seconds
+        os.utime(filePath, (mtime, mtime))
+
+
+def test_versions_are_content_addressed(folder):
+    path = folder + "/body.skin"
+    _export(path, [b"a", b"b", b"b"])
+
+    entries = fv.readManifest(path)["versions"]
+    assert [e["version"] for e in entries] == [1, 2]
+    assert [e["file"] for e in entries] == ["body.v0001.skin", "body.v0002.skin"]
+    assert [_read(fv.getVersionPath(path, v)) for v in (1, 2)] == [b"a", b"b"]
+    assert entries[1]["hash"] == fv.fileHash(path)
+    assert _blobs(path) == sorted(e["blob"] for e in entries)
+
+
+def test_blobs_are_shared_by_the_files_of_a_folder(folder):
+    _export(folder + "/a.skin", [b"same", b"a"])
+    _export(folder + "/b.skin", [b"same", b"b"])
+
+    a = fv.readManifest(folder + "/a.skin")["versions"][0]
+    b = fv.readManifest(folder + "/b.skin")["versions"][0]
+    assert a["blob"] == b["blob"]
+    assert _blobs(folder + "/a.skin") == [a["blob"]]
+
+
+def test_version_file_reads_only_its_own_manifest(folder, monkeypatch):
+    path = folder + "/body.skin"
+    _export(folder + "/other.skin", [b"o1", b"o2"])
+
+    def scan(path):
+        raise AssertionError("versionFile must not scan the other manifests")
+
+    monkeypatch.setattr(fv, "_referencedBlobs", scan)
+    _export(path, [b"1", b"2", b"3"])
+    assert len(fv.readManifest(path)["versions"]) == 2
+
+
+def test_delta_chain_rebuilds_every_version(folder, delta_codec):
+    path = folder + "/body.skin"
+    contents = [_content(i) for i in range(1, fv.KEYFRAME_INTERVAL + 5)]
+    _export(path, contents)
+
+    entries = fv.readManifest(path)["versions"]
+    assert not entries[-1].get("delta")
+    assert not entries[fv.KEYFRAME_INTERVAL - 1].get("delta")
+    assert all(e.get("delta") for e in entries[:fv.KEYFRAME_INTERVAL - 1])
+    for i, content in enumerate(contents[:-1]):
+        assert _read(fv.getVersionPath(path, i + 1)) == content
+
+
+def test_superseded_blobs_are_dropped(folder, delta_codec):
+    path = folder + "/body.skin"
+    contents = [_content(i) for i in range(1, fv.KEYFRAME_INTERVAL + 5)]
+    for n, content in enumerate(contents):
+        _export(path, [content])
+        # ...one stored file per version, a delta or (newest and keyframes) a full blob
+        entries = fv.readManifest(path)["versions"]
+        assert len(entries) == n
+        assert _blobs(path) == sorted(e.get("delta") or e["blob"] for e in entries)
+    assert [_read(fv.getVersionPath(path, v)) for v in range(1, len(contents))] == contents[:-1]
+
+
+def test_superseded_blob_shared_with_another_file_is_kept(folder, delta_codec):
+    _export(folder + "/other.skin", [_content(1), b"other"])
+    path = folder + "/body.skin"
+    _export(path, [_content(1), _content(2), _content(3)])
+
+    shared = fv.readManifest(folder + "/other.skin")["versions"][0]["blob"]
+    assert fv.readManifest(path)["versions"][0].get("delta")
+    assert shared in _blobs(path)
+    assert _read(fv.getVersionPath(folder + "/other.skin", 1)) == _content(1)
+
+
+def test_collect_keeps_a_blob_stored_before_its_manifest(folder):
+    path = folder + "/body.skin"
+    _export(path, [b"1", b"2"])
+    _age(fv.getBlobFolder(path), fv.GC_GRACE_PERIOD + 60)
+
+    # ...another session stored a blob and did not write its manifest yet
+    other = folder + "/other.skin"
+    _write(other, b"pending")
+    old = os.path.getmtime(other) - 2 * fv.GC_GRACE_PERIOD
+    os.utime(other, (old, old))
+    blob = fv._storeBlob(other, other, fv.fileHash(other))
+
+    fv.collectBlobs(path)
+    assert blob in _blobs(path)
+
+
+def test_collect_keeps_everything_when_a_manifest_is_unreadable(folder):
+    path = folder + "/body.skin"
+    _export(folder + "/other.skin", [b"1", b"2"])
+    with open(fv.getManifestPath(folder + "/other.skin"), "w") as fh:
+        fh.write("{")
+    _export(path, [b"a", b"b"])
+    blobs = _blobs(path)
+    _age(fv.getBlobFolder(path), fv.GC_GRACE_PERIOD + 60)
+
+    fv.collectBlobs(path)
+    assert _blobs(path) == blobs
+
+
+def test_archive_renumbers_the_remaining_versions(folder, delta_codec):
+    path = folder + "/body.skin"
+    contents = [_content(i) for i in range(1, 6)]
+    _export(path, contents)
+
+    archiveDir = fv.archiveVersions(path, [2, 3])
+    assert sorted(os.listdir(archiveDir)) == ["body.v0002.skin", "body.v0003.skin"]
+    assert _read(archiveDir + "/body.v0002.skin") == contents[1]
+
+    entries = fv.readManifest(path)["versions"]
+    assert [e["version"] for e in entries] == [1, 2]
+    assert [e["file"] for e in entries] == ["body.v0001.skin", "body.v0002.skin"]
+    assert [_read(fv.getVersionPath(path, v)) for v in (1, 2)] == [contents[0], contents[3]]
+    assert _read(path) == contents[4]
+
+
+def test_archive_of_the_current_file_promotes_the_newest_version(folder):
+    path = folder + "/body.skin"
+    _export(path, [b"1", b"2", b"3"])
+
+    archiveDir = fv.archiveVersions(path, [3])
+    assert _read(archiveDir + "/body.v0003.skin") == b"3"
+    assert _read(path) == b"2"
+    entries = fv.readManifest(path)["versions"]
+    assert [e["version"] for e in entries] == [1]
+    assert _read(fv.getVersionPath(path, 1)) == b"1"
+
+    with pytest.raises(ValueError):
+        fv.archiveVersions(path, [1, 2])
+
+
+def test_legacy_version_folders_are_adopted(folder):
+    path = folder + "/body.skin"
+    _write(path, b"3")
+    versionFolder = fv.getVersionFolder(path)
+    os.makedirs(versionFolder)
+    for i in (1, 2):
+        _write("%s/%s" % (versionFolder, fv.versionFileName("body.skin", i)), b"%d" % i)
+
+    manifest = fv.readManifest(path)
+    assert [e["version"] for e in manifest["versions"]] == [1, 2]
+    assert not os.path.exists(fv.getManifestPath(path))
+
+    fv.versionFile(path)
+    assert [_read(fv.getVersionPath(path, v)) for v in (1, 2, 3)] == [b"1", b"2", b"3"]
+    with open(fv.getManifestPath(path)) as fh:
+        assert len(json.load(fh)["versions"]) == 3
+
+    fv.archiveVersions(path, [1])
+    assert [_read(fv.getVersionPath(path, v)) for v in (1, 2)] == [b"2", b"3"]
+    assert not os.path.isdir(versionFolder)
+
+
+def test_store_blob_refreshes_the_grace_period(folder):
+    path = folder + "/body.skin"
+    _write(path, b"content")
+    contentHash = fv.fileHash(path)
+    blob = fv._storeBlob(path, path, contentHash)
+    blobPath = "%s/%s" % (fv.getBlobFolder(path), blob)
+    old = time.time() - 2 * fv.GC_GRACE_PERIOD
+    os.utime(blobPath, (old, old))
+
+    assert fv._storeBlob(path, path, contentHash) == blob
+    assert os.path.getmtime(blobPath) > old + fv.GC_GRACE_PERIOD
+
+
+def test_files_of_a_folder_are_versioned_in_parallel(folder, delta_codec):
+    paths = ["%s/mesh%d.skin" % (folder, i) for i in range(8)]
+    contents = [_content(i) for i in range(1, 5)]
+    messages = {path: [] for path in paths}
+
+    def export(path):
+        # ...every file has the same contents, the threads store and reuse the same blobs
+        for content in contents:
+            if os.path.exists(path):
+                fv.versionFile(path, log=messages[path].append)
+            _write(path, content)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(export, paths))
+
+    for path in paths:
+        assert [_read(fv.getVersionPath(path, v)) for v in (1, 2, 3)] == contents[:3]
+        assert messages[path] == ["Backup > %s/%s" % (fv.getVersionFolder(path), fv.versionFileName(
+            os.path.basename(path), v)) for v in (1, 2, 3)]
+    assert not [f for f in _blobs(paths[0]) if f.endswith(".tmp")]
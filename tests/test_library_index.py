@@ -0,0 +1,104 @@
+""" headless tests of the cached library listing and version lookups, utils/library_index """
+import os
+
+import pytest
+
+from skin_io_manager.utils import file_versioning
+from skin_io_manager.utils.library_index import LibraryIndex
+
+
+@pytest.fixture
+def folder(tmp_path):
+    return str(tmp_path).replace("\\", "/")
+
+
+def _write(path, content=b"x"):
+    with open(path, "wb") as fh:
+        fh.write(content)
+
+
+def _touch_folder(folder, seconds=10):
+    """ move the folder mtime on, the listing cache goes by it """
+    mtime = os.path.getmtime(folder) + seconds
+    os.utime(folder, (mtime, mtime))
+
+
+def test_listing_is_cached_until_the_folder_changes(folder):
+    index = LibraryIndex()
+    _write(folder + "/a.npySkin")
+    assert sorted(index.listing(folder)) == ["a.npySkin"]
+
+    # ...a new file with the folder mtime put back is not seen until invalidate
+    mtime = os.path.getmtime(folder)
+    _write(folder + "/b.npySkin")
+    os.utime(folder, (mtime, mtime))
+    assert sorted(index.listing(folder)) == ["a.npySkin"]
+    assert sorted(index.listing(folder, force=True)) == ["a.npySkin", "b.npySkin"]
+
+    _write(folder + "/c.npySkin")
+    _touch_folder(folder)
+    assert len(index.listing(folder)) == 3
+    assert index.listing(folder + "/missing") == {}
+
+
+def test_stat_and_invalidate(folder):
+    index = LibraryIndex()
+    path = folder + "/a.npySkin"
+    _write(path, b"12345")
+    assert index.stat(path) == (os.path.getmtime(path), 5)
+    assert index.stat(folder + "/b.npySkin") is None
+
+    # ...an overwrite in place does not touch the folder mtime
+    mtime = os.path.getmtime(folder)
+    _write(path, b"1234567")
+    os.utime(folder, (mtime, mtime))
+    assert index.stat(path)[1] == 5
+    index.invalidate(folder)
+    assert index.stat(path)[1] == 7
+
+
+def test_entries_filter_the_extension_and_read_info_once(folder):
+    index = LibraryIndex()
+    for name in ("b.npySkin", "a.npySkin", "a.json"):
+        _write(folder + "/" + name)
+    os.makedirs(folder + "/sub.npySkin")
+    calls = []
+
+    def info_reader(path):
+        calls.append(os.path.basename(path))
+        return {"vtxCount": 4}
+
+    entries = index.entries(folder, ".npySkin", info_reader=info_reader)
+    assert [e.name for e in entries] == ["a.npySkin", "b.npySkin"]
+    assert all(e.info == {"vtxCount": 4} and e.versions == [] for e in entries)
+    index.entries(folder, ".npySkin", info_reader=info_reader, force=True)
+    assert calls == ["a.npySkin", "b.npySkin"]
+    assert index.entries(folder + "/missing", ".npySkin") == []
+
+
+def test_versions_come_from_the_manifest(folder):
+    index = LibraryIndex()
+    path = folder + "/body.npySkin"
+    for content in (b"1", b"2", b"3"):
+        if os.path.exists(path):
+            file_versioning.versionFile(path, log=lambda message: None)
+        _write(path, content)
+        _touch_folder(folder)
+
+    assert index.versions(path) == ["body.v0001.npySkin", "body.v0002.npySkin"]
+    entries = index.version_entries(path)
+    assert entries == file_versioning.readManifest(path)["versions"]
+    assert index.entries(folder, ".npySkin")[0].versions == index.versions(path)
+
+
+def test_legacy_version_folders_are_listed(folder):
+    index = LibraryIndex()
+    path = folder + "/body.npySkin"
+    _write(path)
+    versionFolder = file_versioning.getVersionFolder(path)
+    os.makedirs(versionFolder)
+    for i in (2, 1):
+        _write("%s/%s" % (versionFolder, file_versioning.versionFileName("body.npySkin", i)))
+
+    assert index.versions(path) == ["body.v0001.npySkin", "body.v0002.npySkin"]
+    assert index.versions(folder + "/other.npySkin") == []
@@ -0,0 +1,45 @@
+""" headless tests of the skin table search, utils/name_search """
+import pytest
+
+from skin_io_manager.utils.name_search import NameSearchIndex, parse_terms
+
+NAMES = ["body_GEO", "L_arm_GEO", "R_arm_GEO", "head_GEO", "L_armShield_PLY"]
+
+
+@pytest.mark.parametrize("text", [None, "", "  ", "*", "a, *", ",,"])
+def test_everything_matches(text):
+    assert parse_terms(text) is None
+    assert NameSearchIndex(NAMES).search(text) is None
+
+
+def test_terms_ignore_whitespace():
+    assert parse_terms(" L_arm , head ") == ["L_arm", "head"]
+
+
+def test_literal_terms_match_anywhere():
+    index = NameSearchIndex(NAMES)
+    assert index.search("arm") == {1, 2, 4}
+    assert index.search("body, head") == {0, 3}
+    assert index.search("missing") == set()
+
+
+def test_wildcards_keep_their_order():
+    index = NameSearchIndex(NAMES)
+    assert index.search("L_*GEO") == {1}
+    assert index.search("*arm*PLY*") == {4}
+    assert index.search("GEO*arm") == set()
+
+
+def test_case_sensitivity():
+    index = NameSearchIndex(NAMES)
+    assert index.search("geo") == set()
+    assert index.search("geo", case_sensitive=False) == {0, 1, 2, 3}
+    assert index.search("l_*geo", case_sensitive=False) == {1}
+
+
+def test_start_row_searches_appended_names_only():
+    index = NameSearchIndex(NAMES)
+    index.add(["L_leg_GEO"])
+    assert len(index) == 6
+    assert index.search("L_", start_row=len(NAMES)) == {5}
+    assert index.search("L_") == {1, 4, 5}
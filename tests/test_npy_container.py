@@ -0,0 +1,96 @@
+""" headless tests of the typed section container, skin/npy_container """
+import os
+
+import numpy as np
+import pytest
+
+from skin_io_manager.skin import npy_container
+
+
+def test_failed_write_keeps_the_previous_file(tmp_path):
+    file_path = str(tmp_path / "body.npySkin")
+    npy_container.write_container(file_path, {"name": "old"}, {"a": np.arange(4)})
+
+    with pytest.raises(ValueError):
+        npy_container.write_container(file_path, {"name": "new"}, {"a": np.arange(8)}, codec="missing")
+
+    assert os.listdir(str(tmp_path)) == ["body.npySkin"]
+    header = npy_container.read_header(file_path)
+    assert header["meta"] == {"name": "old"}
+    np.testing.assert_array_equal(npy_container.read_sections(file_path, header)["a"], np.arange(4))
+
+
+def test_spool_is_written_like_an_array_and_closed(tmp_path):
+    file_path = str(tmp_path / "body.npySkin")
+    with npy_container.SectionSpool("float32") as spool:
+        for start in range(0, 100, 30):
+            spool.append(np.arange(start, min(start + 30, 100)))
+        npy_container.write_container(file_path, {}, {"a": spool})
+    assert spool.fh.closed
+
+    header = npy_container.read_header(file_path)
+    np.testing.assert_array_equal(npy_container.read_sections(file_path, header)["a"], np.arange(100, dtype="float32"))
+
+
+def _sections():
+    return {"weights": np.linspace(0.0, 1.0, 300).reshape(100, 3),
+            "ids": np.arange(50, dtype="int16"),
+            "empty": np.empty(0, dtype="float32")}
+
+
+@pytest.mark.parametrize("codec", [None, "zlib", "lzma", "bz2"])
+def test_round_trip(tmp_path, codec):
+    file_path = str(tmp_path / "body.npySkin")
+    meta = {"name": "body", "vtxCount": np.int64(100), "inf_Array": np.array(["a", "b"])}
+    npy_container.write_container(file_path, meta, _sections(), arrays=["inf_Array"], codec=codec)
+
+    header = npy_container.read_header(file_path)
+    assert header["formatVersion"] == npy_container.FORMAT_VERSION
+    assert header["meta"] == {"name": "body", "vtxCount": 100, "inf_Array": ["a", "b"]}
+    assert header["arrays"] == ["inf_Array"]
+    assert all(s["offset"] % npy_container.ALIGNMENT == 0 for s in header["sections"].values())
+    if codec:
+        assert header["sections"]["weights"]["codec"] == codec
+    sections = npy_container.read_sections(file_path, header)
+    for name, array in _sections().items():
+        assert sections[name].dtype == array.dtype
+        np.testing.assert_array_equal(sections[name], array)
+
+
+def test_sections_are_memory_mapped_unless_asked_not_to(tmp_path):
+    file_path = str(tmp_path / "body.npySkin")
+    npy_container.write_container(file_path, {}, _sections())
+    header = npy_container.read_header(file_path)
+
+    mapped = npy_container.read_sections(file_path, header, names=["weights"])
+    assert list(mapped) == ["weights"]
+    assert isinstance(mapped["weights"], np.memmap)
+    read = npy_container.read_sections(file_path, header, mmap=False)
+    assert not isinstance(read["weights"], np.memmap)
+    np.testing.assert_array_equal(read["weights"], mapped["weights"])
+
+
+def test_corrupt_header_raises(tmp_path):
+    file_path = str(tmp_path / "body.npySkin")
+    npy_container.write_container(file_path, {"name": "body"}, _sections())
+    with open(file_path, "rb") as fh:
+        content = fh.read()
+
+    with open(file_path, "wb") as fh:
+        fh.write(b"NOTASKIN" + content[8:])
+    assert not npy_container.is_container(file_path)
+    with pytest.raises(ValueError):
+        npy_container.read_header(file_path)
+
+    # ...the json header is last, a truncated file loses its end
+    with open(file_path, "wb") as fh:
+        fh.write(content[:-10])
+    with pytest.raises(ValueError):
+        npy_container.read_header(file_path)
+
+
+def test_legacy_file_is_not_a_container(tmp_path):
+    file_path = str(tmp_path / "body.npySkin")
+    with open(file_path, "wb") as fh:
+        np.save(fh, np.arange(4))
+    assert not npy_container.is_container(file_path)
@@ -0,0 +1,76 @@
+""" headless tests of the .npySkin version delta codec, skin/npy_delta """
+import numpy as np
+
+from skin_io_manager.skin import npy_container, npy_delta
+from skin_io_manager.skin.npy_weights import compress_weights
+
+
+def _write(file_path, weights, name="body", codec=None):
+    values, infMap, vertSplit = compress_weights(weights, weights.shape[1])
+    npy_container.write_container(file_path, {"name": name}, dict(weightsNonZero_Array=values,
+                                                                  vertSplit_Array=vertSplit,
+                                                                  infMap_Array=infMap,
+                                                                  blendWeights=np.zeros(len(weights))),
+                                  codec=codec)
+
+
+def _read(file_path):
+    with open(file_path, "rb") as fh:
+        return fh.read()
+
+
+def _weights(vtxCount=50, infCount=6):
+    weights = np.zeros((vtxCount, infCount))
+    weights[np.arange(vtxCount), np.arange(vtxCount) % infCount] = 1.0
+    return weights
+
+
+def test_decode_rebuilds_the_target_byte_for_byte(tmp_path):
+    base, target, delta, out = [str(tmp_path / name) for name in ("base", "target", "delta", "out")]
+    weights = _weights()
+    _write(base, weights)
+    # ...a row that grows, a row that shrinks, a changed value and new attributes
+    weights[3, :3] = [0.5, 0.25, 0.25]
+    weights[7] = 0.0
+    weights[20, 2] = 0.75
+    weights[20, 3] = 0.25
+    _write(target, weights, name="renamed", codec={"blendWeights": "zlib"})
+
+    assert npy_delta.encode(base, target, delta)
+    delta_header = npy_container.read_header(delta)
+    assert npy_container.read_sections(delta, delta_header)["rowIds"].tolist() == [3, 7, 20]
+    npy_delta.decode(base, delta, out)
+    assert _read(out) == _read(target)
+
+
+def test_unchanged_target_has_no_rows(tmp_path):
+    base, target, delta, out = [str(tmp_path / name) for name in ("base", "target", "delta", "out")]
+    _write(base, _weights())
+    _write(target, _weights())
+
+    assert npy_delta.encode(base, target, delta)
+    header = npy_container.read_header(delta)
+    assert len(npy_container.read_sections(delta, header)["rowIds"]) == 0
+    assert header["meta"]["replaced"] == []
+    npy_delta.decode(base, delta, out)
+    assert _read(out) == _read(target)
+
+
+def test_changed_rows():
+    base = compress_weights(_weights(), 6)
+    weights = _weights()
+    weights[[0, 9]] = weights[[9, 0]] * 0.5
+    values, infMap, split = compress_weights(weights, 6)
+    assert npy_delta.changed_rows(base[2], base[0], base[1], split, values, infMap).tolist() == [0, 9]
+
+
+def test_other_vertex_counts_and_legacy_files_are_not_encoded(tmp_path):
+    base, target, delta = [str(tmp_path / name) for name in ("base", "target", "delta")]
+    _write(base, _weights(50))
+    _write(target, _weights(51))
+    assert not npy_delta.encode(base, target, delta)
+
+    with open(target, "wb") as fh:
+        np.save(fh, np.arange(4))
+    assert not npy_delta.encode(base, target, delta)
+    assert not (tmp_path / "delta").exists()
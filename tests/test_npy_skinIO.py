@@ -0,0 +1,99 @@
+""" headless tests of the .npySkin file formats read and written by skin/npy_skinIO.DataIO """
+import numpy as np
+import pytest
+
+from skin_io_manager.skin import npy_container
+from skin_io_manager.skin.npy_skinIO import DataIO
+from skin_io_manager.skin.npy_weights import compress_weights, encode_weights
+
+LEGEND = ('legend', 'weightsNonZero_Array', 'vertSplit_Array', 'infMap_Array', 'inf_Array', 'geometry',
+          'blendWeights', 'blendWeightIds', 'vtxCount', 'name', 'envelope', 'skinningMethod', 'useComponents',
+          'normalizeWeights', 'deformUserNormals', 'type', 'weightPrecision')
+
+
+def _data(precision="float64", infCount=3):
+    """ [legend, item, ...] of a 4 vertex skin, the layout SkinClusterIO.gather returns """
+    weights = np.zeros((4, infCount))
+    if infCount:
+        weights[0, 0] = 1.0
+        weights[1, :2] = 0.5
+        weights[3, -1] = 1.0
+    values, infMap, vertSplit = compress_weights(weights, infCount)
+    values, infMap, vertSplit = encode_weights(values, infMap, vertSplit, precision=precision)
+    items = dict(weightsNonZero_Array=values, vertSplit_Array=vertSplit, infMap_Array=infMap,
+                 inf_Array=np.array(["joint%d" % i for i in range(infCount)]),
+                 geometry="body", blendWeights=np.array([0.25]),
+                 blendWeightIds=np.array([2]), vtxCount=4, name="body_skinCluster", envelope=1.0,
+                 skinningMethod=0, useComponents=False, normalizeWeights=1, deformUserNormals=True,
+                 type="mesh", weightPrecision=precision)
+    return [LEGEND] + [items[item] for item in LEGEND[1:]], weights
+
+
+def _legacy(file_path, data):
+    """ write data like the format version 1 files, np.save of a pickled object array """
+    array = np.empty(len(data), dtype=object)
+    for i, item in enumerate(data):
+        array[i] = item
+    with open(file_path, "wb") as fh:
+        np.save(fh, array, allow_pickle=True)
+
+
+def _assert_data_equal(read, data):
+    assert tuple(read[0]) == tuple(data[0])
+    for item, a, b in zip(data[0][1:], read[1:], data[1:]):
+        if isinstance(b, np.ndarray):
+            np.testing.assert_array_equal(a, b, err_msg=item)
+        else:
+            assert a == b, item
+
+
+@pytest.mark.parametrize("precision", ["float64", "float32"])
+def test_write_read_round_trip(tmp_path, precision):
+    file_path = str(tmp_path / "body.npySkin")
+    data, _ = _data(precision)
+    DataIO.write(file_path, data, codec="zlib")
+
+    assert DataIO.get_formatVersion(file_path) == npy_container.FORMAT_VERSION
+    _assert_data_equal(DataIO.read(file_path), data)
+    assert DataIO.read_contentHash(file_path) == DataIO.content_hash(data)
+    assert DataIO.read_metadata(file_path) == dict(vtxCount=4, infCount=3, geometry="body",
+                                                   skinningMethod=0, formatVersion=npy_container.FORMAT_VERSION)
+
+
+def test_quantized_weights_are_read_as_float(tmp_path):
+    file_path = str(tmp_path / "body.npySkin")
+    data, weights = _data("uint16")
+    DataIO.write(file_path, data)
+
+    read = DataIO.read(file_path)
+    values = DataIO.get_dataItem(read, "weightsNonZero_Array")
+    assert values.dtype.kind == "f"
+    # ...a vertex still sums to 1, the halves get one quantization step apart
+    np.testing.assert_allclose(values, weights[weights != 0], atol=1.0 / 65535)
+    assert values[1] + values[2] == pytest.approx(1.0)
+
+
+def test_empty_influences_round_trip(tmp_path):
+    file_path = str(tmp_path / "body.npySkin")
+    data, _ = _data(infCount=0)
+    DataIO.write(file_path, data)
+
+    read = DataIO.read(file_path)
+    _assert_data_equal(read, data)
+    assert len(DataIO.get_dataItem(read, "weightsNonZero_Array")) == 0
+    assert DataIO.read_metadata(file_path)["infCount"] == 0
+
+
+def test_legacy_files_are_read_through_np_load(tmp_path):
+    file_path = str(tmp_path / "body.npySkin")
+    data, _ = _data()
+    _legacy(file_path, data)
+
+    assert DataIO.get_formatVersion(file_path) == npy_container.LEGACY_FORMAT_VERSION
+    assert DataIO.read_contentHash(file_path) is None
+    _assert_data_equal(DataIO.read(file_path), data)
+    assert DataIO.read_metadata(file_path) == dict(vtxCount=None, infCount=None, geometry=None,
+                                                   skinningMethod=None,
+                                                   formatVersion=npy_container.LEGACY_FORMAT_VERSION)
+    metadata = DataIO.read_metadata(file_path, legacy_full_read=True)
+    assert (metadata["vtxCount"], metadata["infCount"]) == (4, 3)
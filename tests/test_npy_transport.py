@@ -0,0 +1,92 @@
+""" headless tests of skin/npy_transport, the maya modules are faked
+
+The buffer path is taken for mArrays exposing their memory, the list path for the others.
+"""
+import numpy as np
+import pytest
+
+from skin_io_manager.skin.npy_benchmark import _FakeApi2, _FakeBufferApi2
+from skin_io_manager.skin.npy_transport import WeightTransport
+
+
+class FakeSkinCluster(object):
+    """ keeps the mArrays it was given, hands them back like MFnSkinCluster does """
+
+    def __init__(self, om2, infCount):
+        self.om2 = om2
+        self.infCount = infCount
+        self.weights = om2.MDoubleArray()
+        self.blendWeights = om2.MDoubleArray()
+
+    def influenceObjects(self):
+        return [None] * self.infCount
+
+    def getWeights(self, shape, components):
+        return self.weights, self.infCount
+
+    def setWeights(self, shape, components, influenceIndices, weights, normalize):
+        assert isinstance(influenceIndices, self.om2.MIntArray)
+        assert isinstance(weights, self.om2.MDoubleArray)
+        assert list(influenceIndices) == list(range(self.infCount))
+        self.weights = weights
+
+    def getBlendWeights(self, shape, components):
+        return self.blendWeights
+
+    def setBlendWeights(self, shape, components, blendWeights):
+        self.blendWeights = blendWeights
+
+
+@pytest.fixture(params=[_FakeBufferApi2, _FakeApi2], ids=["buffer", "list"])
+def om2(request):
+    return request.param
+
+
+def test_buffer_path_is_detected(om2):
+    transport = WeightTransport(om2=om2)
+    assert transport.has_buffer(om2.MDoubleArray) == (om2 is _FakeBufferApi2)
+    assert transport.has_buffer(om2.MIntArray) == (om2 is _FakeBufferApi2)
+
+
+def test_conversions_round_trip(om2):
+    transport = WeightTransport(om2=om2)
+    weights = np.random.RandomState(0).rand(50, 3)
+
+    mArray = transport.to_mDoubleArray(weights)
+    assert isinstance(mArray, om2.MDoubleArray)
+    assert list(mArray) == weights.ravel().tolist()
+    np.testing.assert_array_equal(transport.from_mArray(mArray).reshape(50, 3), weights)
+
+    ids = transport.to_mIntArray(np.array([4, 0, 7], dtype="int64"))
+    assert list(ids) == [4, 0, 7]
+    assert transport.from_mArray(ids, dtype="int32").tolist() == [4, 0, 7]
+
+
+def test_read_back_is_a_copy():
+    transport = WeightTransport(om2=_FakeBufferApi2)
+    mArray = transport.to_mDoubleArray([0.25, 0.75])
+    weights = transport.from_mArray(mArray)
+    mArray[0] = 1.0
+    assert weights.tolist() == [0.25, 0.75]
+
+
+def test_skin_cluster_weights_round_trip(om2):
+    transport = WeightTransport(om2=om2)
+    fnSkinCluster = FakeSkinCluster(om2, infCount=4)
+    weights = np.random.RandomState(1).rand(10, 4)
+
+    transport.set_weights(fnSkinCluster, None, None, weights)
+    result, infCount = transport.get_weights(fnSkinCluster, None, None)
+    assert infCount == 4
+    np.testing.assert_array_equal(result, weights)
+
+    blendWeights = np.linspace(0.0, 1.0, 10)
+    transport.set_blend_weights(fnSkinCluster, None, None, blendWeights)
+    np.testing.assert_array_equal(transport.get_blend_weights(fnSkinCluster, None, None), blendWeights)
+
+
+def test_empty_arrays(om2):
+    transport = WeightTransport(om2=om2)
+    assert len(transport.to_mDoubleArray(np.zeros((0, 3)))) == 0
+    result, infCount = transport.get_weights(FakeSkinCluster(om2, infCount=0), None, None)
+    assert infCount == 0 and result.shape == (0, 0)
@@ -0,0 +1,95 @@
+""" headless tests of the CSR weights, storage modes and blend weights of skin/npy_weights """
+import numpy as np
+import pytest
+
+from skin_io_manager.skin import npy_weights as nw
+
+
+def _skin(vtxCount=200, infCount=12, maxInfluences=4, seed=0):
+    """ normalized dense (vtx, inf) weights with at most maxInfluences per vertex """
+    rng = np.random.RandomState(seed)
+    weights = np.zeros((vtxCount, infCount))
+    for row in weights:
+        ids = rng.choice(infCount, rng.randint(1, maxInfluences + 1), replace=False)
+        row[ids] = rng.rand(len(ids))
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def test_compress_expand_round_trip():
+    weights = _skin()
+    values, infMap, vertSplit = nw.compress_weights(weights.ravel(), weights.shape[1])
+    assert len(vertSplit) == len(weights) + 1 and vertSplit[-1] == len(values)
+    assert infMap.dtype == vertSplit.dtype == np.dtype(nw.csr_index_dtype)
+    np.testing.assert_array_equal(nw.expand_weights(values, infMap, vertSplit, weights.shape[1]), weights)
+
+
+def test_compress_without_influences():
+    values, infMap, vertSplit = nw.compress_weights(np.empty(0), 0)
+    assert len(values) == len(infMap) == 0
+    assert vertSplit.tolist() == [0]
+    assert nw.expand_weights(values, infMap, vertSplit, 0).shape == (0, 0)
+
+
+def test_all_zero_rows_keep_their_vertex():
+    weights = _skin(vtxCount=6)
+    weights[[0, 3, 5]] = 0.0
+    values, infMap, vertSplit = nw.compress_weights(weights, weights.shape[1])
+    assert (np.diff(vertSplit)[[0, 3, 5]] == 0).all()
+    np.testing.assert_array_equal(nw.expand_weights(values, infMap, vertSplit, weights.shape[1]), weights)
+
+    quantized = nw.quantize_weights(values, vertSplit)
+    rows = np.repeat(np.arange(len(weights)), np.diff(vertSplit))
+    sums = np.bincount(rows, weights=quantized, minlength=len(weights))
+    assert sums[[0, 3, 5]].tolist() == [0, 0, 0]
+    assert (np.delete(sums, [0, 3, 5]) == nw.QUANTIZE_SCALE).all()
+
+
+def test_quantized_vertices_sum_to_the_scale():
+    weights = _skin(vtxCount=1000, infCount=40, maxInfluences=8, seed=1)
+    values, infMap, vertSplit = nw.compress_weights(weights, weights.shape[1])
+    quantized = nw.quantize_weights(values, vertSplit)
+    assert quantized.dtype == np.dtype("uint16")
+    rows = np.repeat(np.arange(len(weights)), np.diff(vertSplit))
+    assert (np.bincount(rows, weights=quantized) == nw.QUANTIZE_SCALE).all()
+    assert np.abs(nw.dequantize_weights(quantized) - values).max() <= 1.0 / nw.QUANTIZE_SCALE
+
+
+def test_quantize_hands_lost_steps_to_the_largest_remainders():
+    # ...three thirds floor to 21845 each, the lost step goes to one of them
+    quantized = nw.quantize_weights(np.full(3, 1.0 / 3), np.array([0, 3]))
+    assert sorted(quantized.tolist()) == [21845, 21845, 21845]
+    quantized = nw.quantize_weights(np.array([0.50001, 0.49999]), np.array([0, 2]))
+    assert quantized.sum() == nw.QUANTIZE_SCALE and quantized[0] > quantized[1]
+
+
+@pytest.mark.parametrize("precision", nw.PRECISIONS)
+def test_storage_modes_decode_to_the_weights(precision):
+    weights = _skin()
+    values, infMap, vertSplit = nw.compress_weights(weights, weights.shape[1])
+    stored, storedInfMap, storedSplit = nw.encode_weights(values, infMap, vertSplit, precision=precision,
+                                                         index="int16")
+    assert stored.dtype == np.dtype(precision)
+    assert storedInfMap.dtype == np.dtype("int16")
+    decoded = nw.decode_weights(stored, precision)
+    tolerance = {"float64": 0.0, "float32": 1e-7, "uint16": 1.0 / nw.QUANTIZE_SCALE}[precision]
+    assert np.abs(decoded - values).max() <= tolerance
+
+
+def test_int16_index_falls_back_to_int32():
+    infMap = np.array([0, np.iinfo("int16").max + 1])
+    _, stored, _ = nw.encode_weights(np.ones(2), infMap, np.array([0, 2]), index="int16")
+    assert stored.dtype == np.dtype("int32")
+    with pytest.raises(ValueError):
+        nw.encode_weights(np.ones(2), infMap, np.array([0, 2]), precision="float16")
+
+
+def test_blend_weights_round_trip():
+    dense = np.zeros(10)
+    dense[[2, 7]] = [0.25, 1.0]
+    ids, values = nw.sparse_blend_weights(dense + 1e-9)
+    assert ids.tolist() == [2, 7] and values.tolist() == [0.25, 1.0]
+    np.testing.assert_array_equal(nw.dense_blend_weights(ids, values, 10), dense)
+
+    ids, values = nw.sparse_blend_weights([])
+    assert len(ids) == len(values) == 0
+    assert nw.dense_blend_weights(ids, values, 3).tolist() == [0.0, 0.0, 0.0]